@@ -0,0 +1,191 @@
+import bisect
+import contextlib
+import datetime
+import json
+import os
+import threading
+
+import pandas as pd
+
+from index_annonces import cles_annonces
+from stockage import DOSSIER_PARQUET, lire_annonces, version_stockage
+
+# Le verrou de fichier (fcntl) n'existe pas sous Windows : les écrivains d'un même processus restent protégés
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DOSSIER_AGREGATS = 'data/agregats'
+
+# Je range les prix dans des intervalles logarithmiques (10 par puissance de 10, de 100 à 100 millions CFA) :
+# l'erreur sur les quantiles reste sous 26 % quel que soit le niveau de prix
+BORNES_PRIX = [round(10 ** (exposant / 10)) for exposant in range(20, 81)]
+
+# Les tâches de scraping et l'import CSV du dashboard peuvent écrire les mêmes statistiques en même temps
+_VERROU_ECRITURE = threading.Lock()
+
+
+# Classe qui tient à jour les statistiques du dashboard pour une catégorie
+class Agregats:
+    """
+    Statistiques d'une catégorie (répartition des prix, annonces par ville et par date de scraping),
+    mises à jour à chaque écriture dans le stockage au lieu d'être recalculées à chaque affichage.
+    Chaque mise à jour relit le fichier sous verrou : plusieurs écrivains (threads ou processus) ne perdent rien.
+    """
+
+    def __init__(self, categorie, dossier=DOSSIER_AGREGATS, dossier_parquet=DOSSIER_PARQUET):
+        self.categorie = categorie
+        self.chemin = os.path.join(dossier, f"{categorie}.json")
+        self.dossier_parquet = dossier_parquet
+        os.makedirs(dossier, exist_ok=True)
+
+        if not self._charger():
+            with self._verrou():
+                # Un autre écrivain a pu les calculer pendant que j'attendais le verrou
+                if not self._charger():
+                    # Pas encore de statistiques : je les calcule une fois à partir du stockage existant
+                    self.donnees = self._vides()
+                    self._recalculer()
+
+    def _charger(self):
+        try:
+            with open(self.chemin, encoding='utf-8') as f:
+                self.donnees = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    @contextlib.contextmanager
+    def _verrou(self):
+        with _VERROU_ECRITURE, open(self.chemin + '.lock', 'w') as f:
+            if fcntl is not None:
+                # Le verrou est libéré à la fermeture du fichier
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _vides():
+        return {
+            'lignes': 0,
+            'prix': {'comptes': [0] * (len(BORNES_PRIX) + 1), 'sans_prix': 0, 'somme': 0, 'min': None, 'max': None},
+            'villes': {},
+            'dates': {}
+        }
+
+    def _recalculer(self):
+        if version_stockage(self.categorie, self.dossier_parquet) is None:
+            return
+
+        df = lire_annonces(self.categorie, dossier=self.dossier_parquet)
+        # Les fichiers écrits avant l'index des annonces peuvent encore contenir des doublons
+        df = df[~cles_annonces(df).duplicated(keep='last').to_numpy()]
+        for date_scrape, lignes in df.groupby('date_scrape', observed=True):
+            self._cumuler(lignes, str(date_scrape))
+        self._sauvegarder()
+
+    def _cumuler(self, df, date_scrape):
+        self.donnees['lignes'] += len(df)
+        dates = self.donnees['dates']
+        dates[date_scrape] = dates.get(date_scrape, 0) + len(df)
+
+        if 'Prix_nettoye' in df.columns:
+            prix = self.donnees['prix']
+            # Un prix nul n'est pas un vrai prix : je le compte avec les prix sur demande
+            valeurs = df['Prix_nettoye'].dropna()
+            valeurs = valeurs[valeurs > 0]
+            prix['sans_prix'] += len(df) - len(valeurs)
+            if len(valeurs):
+                valeurs = valeurs.astype('int64')
+                # Je compte les prix par intervalle en une seule passe vectorisée
+                intervalles = pd.Series(pd.cut(valeurs, [-1] + BORNES_PRIX + [float('inf')], labels=False))
+                for intervalle, nombre in intervalles.value_counts().items():
+                    prix['comptes'][int(intervalle)] += int(nombre)
+                prix['somme'] += int(valeurs.sum())
+                prix['min'] = int(valeurs.min()) if prix['min'] is None else min(prix['min'], int(valeurs.min()))
+                prix['max'] = int(valeurs.max()) if prix['max'] is None else max(prix['max'], int(valeurs.max()))
+
+        if 'Ville' in df.columns:
+            villes = self.donnees['villes']
+            for ville, nombre in df['Ville'].value_counts().items():
+                if nombre > 0:
+                    villes[ville] = villes.get(ville, 0) + int(nombre)
+
+    def _sauvegarder(self):
+        # J'écris dans un fichier temporaire pour ne jamais laisser des statistiques à moitié écrites
+        temporaire = self.chemin + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.donnees, f, ensure_ascii=False)
+        os.replace(temporaire, self.chemin)
+
+    def ajouter(self, df, date_scrape=None):
+        """
+        Ajoute aux statistiques les lignes qui viennent d'être écrites dans le stockage
+        """
+        if len(df) == 0:
+            return
+        if date_scrape is None:
+            date_scrape = datetime.date.today().isoformat()
+
+        # Je repars des statistiques sur le disque : un autre écrivain a pu les mettre à jour depuis ma lecture
+        with self._verrou():
+            self._charger()
+            self._cumuler(df, date_scrape)
+            self._sauvegarder()
+
+    @property
+    def lignes(self):
+        return self.donnees['lignes']
+
+    def nombre_prix(self):
+        return sum(self.donnees['prix']['comptes'])
+
+    def quantile(self, q):
+        """
+        Renvoie une estimation du quantile q des prix (interpolation dans l'intervalle), ou None
+        """
+        prix = self.donnees['prix']
+        total = sum(prix['comptes'])
+        if total == 0:
+            return None
+
+        rang = q * total
+        cumul = 0
+        bornes = [0] + BORNES_PRIX + [prix['max']]
+        for intervalle, compte in enumerate(prix['comptes']):
+            if compte and cumul + compte >= rang:
+                # Je reste dans les prix réellement observés
+                bas = max(bornes[intervalle], prix['min'])
+                haut = min(bornes[intervalle + 1], prix['max'])
+                return round(bas + (haut - bas) * (rang - cumul) / compte)
+            cumul += compte
+        return prix['max']
+
+    def repartition_prix(self):
+        """
+        Renvoie le nombre d'annonces par intervalle de prix, indexé par la borne haute de l'intervalle
+        """
+        prix = self.donnees['prix']
+        if prix['min'] is None:
+            return pd.Series(dtype='int64')
+
+        # Je n'affiche que les intervalles entre le prix minimum et le prix maximum
+        premier = bisect.bisect_left(BORNES_PRIX, prix['min'])
+        dernier = bisect.bisect_left(BORNES_PRIX, prix['max'])
+        bornes = (BORNES_PRIX + [prix['max']])[premier:dernier + 1]
+        return pd.Series(prix['comptes'][premier:dernier + 1], index=pd.Index(bornes, name='Prix (CFA)'))
+
+    def villes(self, nombre=None):
+        """
+        Renvoie le nombre d'annonces par ville, de la plus fréquente à la moins fréquente
+        """
+        villes = pd.Series(self.donnees['villes'], dtype='int64').sort_values(ascending=False)
+        return villes if nombre is None else villes.head(nombre)
+
+    def evolution(self):
+        """
+        Renvoie le nombre de nouvelles annonces par date de scraping
+        """
+        dates = pd.Series(self.donnees['dates'], dtype='int64').sort_index()
+        dates.index = pd.to_datetime(dates.index)
+        return dates
@@ -0,0 +1,105 @@
+import time
+from urllib.parse import urljoin
+
+from lxml import etree, html
+
+from metriques import METRIQUES
+
+
+# Fonction pour construire un test de classe CSS en XPath (équivalent de .ma-classe)
+def _avec_classe(classe):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {classe} ')"
+
+
+# Je compile les expressions XPath une seule fois au chargement du module
+XPATH_CARTES = etree.XPath("//div[normalize-space(@class)='col s6 m4 l3']")
+XPATH_DESCRIPTION = etree.XPath(f"(.//p[{_avec_classe('ad__card-description')}])[1]")
+XPATH_PRIX = etree.XPath(f"(.//p[{_avec_classe('ad__card-price')}])[1]")
+XPATH_ADRESSE = etree.XPath(f"(.//p[{_avec_classe('ad__card-location')}])[1]//span[1]")
+XPATH_IMAGE = etree.XPath(f"(.//img[{_avec_classe('ad__card-img')}])[1]")
+XPATH_LIEN = etree.XPath("(.//a[normalize-space(@class)='card-image ad__card-image waves-block waves-light'])[1]/@href")
+XPATH_PARAGRAPHES_DETAIL = etree.XPath(
+    "(//div[normalize-space(@class)='ad__info__box ad__info__box-descriptions'])[1]//p"
+)
+
+URL_SITE = 'https://sn.coinafrique.com'
+
+
+def _parser(contenu):
+    # Je parse le document avec lxml, bien plus rapide que html.parser de BeautifulSoup
+    if not contenu or not contenu.strip():
+        return None
+    try:
+        return html.document_fromstring(contenu)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _texte(elements):
+    # Je renvoie le texte du premier élément trouvé, comme .text de BeautifulSoup
+    return elements[0].text_content() if elements else None
+
+
+# Fonction pour extraire les cartes d'une page de liste
+def extraire_cartes(contenu, url_page=URL_SITE):
+    """
+    Renvoie pour chaque carte un dictionnaire avec le nom, le prix, l'adresse,
+    le lien de l'image et le lien vers la page de détail (résolu par rapport à url_page)
+    """
+    debut = time.perf_counter()
+    document = _parser(contenu)
+    if document is None:
+        METRIQUES.echec('page_illisible')
+        return []
+
+    elements = XPATH_CARTES(document)
+    METRIQUES.incrementer('cartes_trouvees', len(elements))
+
+    cartes = []
+    for carte in elements:
+        prix = _texte(XPATH_PRIX(carte))
+        adresse = _texte(XPATH_ADRESSE(carte))
+        image = XPATH_IMAGE(carte)
+
+        # Je saute les cartes incomplètes, comme le faisait l'ancienne extraction, en notant ce qui manque
+        if prix is None:
+            METRIQUES.echec('carte_sans_prix')
+            continue
+        if adresse is None:
+            METRIQUES.echec('carte_sans_adresse')
+            continue
+        if not image:
+            METRIQUES.echec('carte_sans_image')
+            continue
+
+        description = _texte(XPATH_DESCRIPTION(carte))
+        lien = XPATH_LIEN(carte)
+
+        cartes.append({
+            'nom': description.strip() if description is not None else None,
+            'prix': prix.strip('CFA'),
+            'adresse': adresse.strip(),
+            'image_lien': image[0].get('src'),
+            'lien_detail': urljoin(url_page, lien[0]) if lien else None
+        })
+
+    METRIQUES.incrementer('cartes_extraites', len(cartes))
+    METRIQUES.observer('temps_analyse_secondes', time.perf_counter() - debut)
+    return cartes
+
+
+# Fonction pour extraire le détail d'une page d'annonce
+def extraire_detail(contenu):
+    """
+    Renvoie le détail du produit, ou None si la page ne le contient pas
+    """
+    debut = time.perf_counter()
+    document = _parser(contenu)
+    paragraphes = XPATH_PARAGRAPHES_DETAIL(document) if document is not None else []
+    METRIQUES.observer('temps_analyse_secondes', time.perf_counter() - debut)
+
+    # Le premier p contient "Détails du produit", je prends le deuxième
+    if len(paragraphes) < 2:
+        METRIQUES.echec('detail_absent')
+        return None
+    return paragraphes[1].text_content().strip()
@@ -1,10 +1,19 @@
+import uuid
+
 import streamlit as st
 import pandas as pd
-from requests import get
-from bs4 import BeautifulSoup as bs
-import time
+
+from donnees import categories_manquantes, charger_agregats, exporter_donnees_brutes, obtenir_navigateur, table_navigation
+from export import FORMATS_EXPORT
+from images import CacheImages, creer_client_images, creer_pool_vignettes, recuperer_vignettes, trouver_doublons
+from metriques import METRIQUES
+from scraper import creer_client
+from taches import ANNULEE, GestionnaireTaches
 
 
+# Plus grand entier que JavaScript représente exactement
+ENTIER_JS_MAX = 2 ** 53 - 1
+
 # Je configure la page Streamlit
 st.set_page_config(page_title="Application Web Scraping", layout="wide")
 
@@ -34,149 +43,190 @@ option_choisie = st.sidebar.selectbox(
     ]
 )
 
+# Je permets de rejouer les pages déjà téléchargées sans contacter le site
+preferer_cache = st.sidebar.checkbox(
+    "Utiliser les pages en cache (hors ligne)",
+    value=False
+)
+
+# Je permets de ne récupérer que les nouvelles annonces depuis le dernier scraping
+mode_incremental = st.sidebar.checkbox(
+    "Mode incrémental (nouvelles annonces seulement)",
+    value=False
+)
+
 # Je stocke le nombre de pages dans session_state
 if 'nombre_pages' not in st.session_state:
     st.session_state.nombre_pages = nombre_pages
 else:
     st.session_state.nombre_pages = nombre_pages
 
-# Fonction pour scraper les données d'une catégorie
-def scraper_categorie(url_base, nombre_pages, nom_colonne):
+# J'identifie la session pour savoir qui suit chaque scraping partagé
+if 'id_session' not in st.session_state:
+    st.session_state.id_session = uuid.uuid4().hex
+
+# Je crée un seul client HTTP partagé entre les reruns et les sessions
+@st.cache_resource
+def obtenir_client():
+    """
+    Renvoie le client HTTP partagé du scraper
+    """
+    return creer_client()
+
+# Je crée un seul gestionnaire de tâches, partagé par toutes les sessions
+@st.cache_resource
+def obtenir_gestionnaire():
+    """
+    Renvoie le gestionnaire des scrapings en arrière-plan
+    """
+    return GestionnaireTaches(obtenir_client())
+
+# Je crée un seul pipeline d'images (client, cache des vignettes, pool de processus) pour toutes les sessions
+@st.cache_resource
+def obtenir_pipeline_images():
     """
-    Scrape les données d'une catégorie d'animaux sur plusieurs pages
+    Renvoie le client HTTP des images, le cache des vignettes et le pool de processus
     """
-    tous_les_items = []
+    return creer_client_images(), CacheImages(), creer_pool_vignettes()
+
+# Fonction pour afficher une table page par page
+# Dans un fragment : changer de page ou de filtre ne relance que le tableau
+@st.fragment
+def afficher_navigateur(table, cle):
+    """
+    Affiche une table avec filtres, tri et pagination faits par SQLite : seule la page visible est envoyée au navigateur
+    """
+    navigateur = obtenir_navigateur()
+    colonnes = navigateur.colonnes(table)
+    
+    col1, col2, col3 = st.columns(3)
+    recherche = col1.text_input("Rechercher dans le nom ou les détails", key=f"{cle}_recherche")
+    villes = None
+    if 'Ville' in colonnes:
+        villes = col2.multiselect("Villes", navigateur.valeurs_distinctes(table, 'Ville'), key=f"{cle}_villes")
+    prix_min = prix_max = None
+    if 'Prix_nettoye' in colonnes:
+        prix_bas, prix_haut = navigateur.bornes(table, 'Prix_nettoye')
+        # Le navigateur ne sait pas représenter exactement les entiers au-delà de 2^53 - 1 (prix aberrants)
+        if prix_haut is not None:
+            prix_bas, prix_haut = min(prix_bas, ENTIER_JS_MAX), min(prix_haut, ENTIER_JS_MAX)
+        if prix_bas is not None and prix_bas < prix_haut:
+            prix_min, prix_max = col3.slider("Prix (CFA)", prix_bas, prix_haut, (prix_bas, prix_haut), key=f"{cle}_prix")
+            # Sans filtre de prix, je garde aussi les annonces sans prix
+            if (prix_min, prix_max) == (prix_bas, prix_haut):
+                prix_min = prix_max = None
+    filtres = {'prix_min': prix_min, 'prix_max': prix_max, 'villes': villes, 'recherche': recherche}
     
-    # Je crée une progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    col1, col2, col3, col4 = st.columns(4)
+    tri = col1.selectbox("Trier par", [None] + colonnes, format_func=lambda colonne: colonne or "Ordre d'origine", key=f"{cle}_tri")
+    descendant = col2.checkbox("Ordre décroissant", key=f"{cle}_descendant")
+    lignes_par_page = col3.selectbox("Lignes par page", [25, 50, 100], index=1, key=f"{cle}_lignes")
     
-    for page_num in range(1, nombre_pages + 1):
-        # Je construis l'URL de la page
-        if page_num == 1:
-            url = url_base
-        else:
-            url = f"{url_base}?page={page_num}"
+    total = navigateur.compter(table, **filtres)
+    nombre_pages_table = max(1, (total - 1) // lignes_par_page + 1)
+    page = col4.number_input(f"Page (sur {nombre_pages_table})", min_value=1, max_value=nombre_pages_table, value=1, key=f"{cle}_page")
+    
+    df_page = navigateur.interroger(table, tri, descendant, lignes_par_page, (page - 1) * lignes_par_page, **filtres)
+    st.dataframe(df_page, width='stretch', hide_index=True)
+    st.caption(f"{total} annonces trouvées")
+
+# Fonction pour afficher la galerie des photos d'une table
+# Dans son propre fragment : les widgets du tableau ne relancent pas les téléchargements
+@st.fragment
+def afficher_galerie(table, cle):
+    """
+    Affiche les photos page par page : seules les vignettes de la page visible sont récupérées
+    """
+    navigateur = obtenir_navigateur()
+    nombre_photos = navigateur.compter(table, avec_image=True)
+    
+    if nombre_photos > 0:
+        client_images, cache_images, pool_images = obtenir_pipeline_images()
         
-        status_text.text(f"Je scrape la page {page_num}/{nombre_pages}...")
+        photos_par_page = 24
+        nombre_pages_galerie = (nombre_photos - 1) // photos_par_page + 1
+        page_galerie = st.number_input(
+            f"Page de la galerie (sur {nombre_pages_galerie})",
+            min_value=1,
+            max_value=nombre_pages_galerie,
+            value=1,
+            key=f"galerie_{cle}"
+        )
+        visibles = navigateur.interroger(table, limite=photos_par_page, decalage=(page_galerie - 1) * photos_par_page, avec_image=True)
         
-        try:
-            # Je fais la requête HTTP avec un User-Agent : Permet d'éviter d'être bloqué par le site
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = get(url, headers=headers)
-            
-            # Je parse le HTML avec BeautifulSoup
-            soup = bs(response.content, 'html.parser')
-            
-            # Je trouve toutes les cartes d'annonces selon la structure HTML
-            cartes = soup.find_all('div', 'col s6 m4 l3')
-            
-            status_text.text(f"Je scrape la page {page_num}/{nombre_pages}... {len(cartes)} annonces trouvées")
-            
-            # Je boucle sur chaque carte
-            for idx, carte in enumerate(cartes):
-                try:
-                    # Je vérifie si je dois récupérer le détail du produit
-                    if nom_colonne == "Details":
-                        # Je récupère le lien vers la page de détail
-                        lien_element = carte.find('a', 'card-image ad__card-image waves-block waves-light')
-                        if lien_element:
-                            carte_lien = 'https://sn.coinafrique.com' + lien_element.get('href')
-                            
-                            status_text.text(f"Page {page_num}/{nombre_pages} - Annonce {idx+1}/{len(cartes)} - Récupération du détail...")
-                            
-                            # Je fais une requête pour récupérer la page de détail
-                            response_detail = get(carte_lien, headers=headers, timeout=10)
-                            soup_detail = bs(response_detail.content, 'html.parser')
-                            
-                            # Je récupère le détail du produit
-                            detail_box = soup_detail.find('div', 'ad__info__box ad__info__box-descriptions')
-                            
-                            # Je récupère tous les paragraphes
-                            paragraphes = detail_box.find_all('p')
-                            # Le premier p contient "Détails du produit", je prends le deuxième
-                            nom = paragraphes[1].text.strip()
-                            
-                            # J'attends un peu pour ne pas surcharger le serveur
-                            time.sleep(1)
-                        else:
-                            # Si je ne trouve pas le lien, je prends le nom de la carte
-                            nom = carte.find('p', 'ad__card-description').text.strip()
-                    else:
-                        # Je récupère simplement le nom depuis ad__card-description
-                        nom = carte.find('p', 'ad__card-description').text.strip()
-                    
-                    # J'extrais le prix depuis ad__card-price
-                    prix = carte.find('p', class_='ad__card-price').text.strip('CFA')
-                    
-                    # J'extrais l'adresse depuis ad__card-location
-                    adresse = carte.find('p', class_='ad__card-location').find('span').text.strip()
-                    
-                    # J'extrais l'image depuis ad__card-img
-                    image_lien = carte.find('img', 'ad__card-img').get('src')
-                    
-                    # J'ajoute les données à ma liste seulement si j'ai au moins un nom
-                    tous_les_items.append({
-                        nom_colonne: nom,
-                        'Prix': prix,
-                        'Adresse': adresse,
-                        'Image_lien': image_lien
-                    })
-                    
-                except Exception as e:
-                    # Je continue si une annonce pose problème
-                    continue
-            
-            # Je mets à jour la progress bar
-            progress_bar.progress(page_num / nombre_pages)
-            
-            # J'attends un peu entre chaque page pour ne pas surcharger le serveur
-            time.sleep(2)
+        with st.spinner("Chargement des photos..."):
+            chemins = recuperer_vignettes(client_images, cache_images, visibles['Image_lien'], pool_images)
+        
+        # Je prends la première colonne (Nom ou Details) comme légende
+        premiere_colonne = visibles.columns[0]
+        colonnes_galerie = st.columns(6)
+        for position, (_, annonce) in enumerate(visibles.iterrows()):
+            with colonnes_galerie[position % 6]:
+                legende = f"{str(annonce[premiere_colonne])[:40]} - {annonce['Prix_nettoye'] if pd.notna(annonce['Prix_nettoye']) else 'Prix sur demande'}"
+                chemin = chemins.get(annonce['Image_lien'])
+                if chemin:
+                    st.image(chemin, caption=legende, width='stretch')
+                else:
+                    st.caption(f"Photo indisponible - {legende}")
+        
+        # Je repère les annonces republiées avec la même photo, parmi les photos déjà téléchargées
+        if st.button("Chercher les photos en double"):
+            empreintes = {lien: cache_images.dhash(lien) for lien in navigateur.valeurs_distinctes(table, 'Image_lien')}
+            empreintes = {lien: dhash for lien, dhash in empreintes.items() if dhash}
+            groupes = trouver_doublons(empreintes)
             
-        except Exception as e:
-            st.error(f"Erreur lors du scraping de la page {page_num}: {str(e)}")
-            continue
-    
-    progress_bar.empty()
-    status_text.empty()
-    
-    return tous_les_items
+            st.write(f"{len(groupes)} photos apparaissent dans plusieurs annonces (parmi {len(empreintes)} photos déjà téléchargées)")
+            for groupe in groupes[:10]:
+                vignettes = [chemin for chemin in map(cache_images.chemin_vignette, groupe) if chemin]
+                if vignettes:
+                    st.image(vignettes, width=120)
+    else:
+        st.info("Aucune photo à afficher")
 
-# Fonction pour nettoyer les données
-def nettoyer_donnees(df):
+# Fonction pour afficher les mesures du scraper
+def afficher_diagnostics():
     """
-    Nettoie les données scrapées
+    Affiche le panneau de diagnostics : réseau, analyse, extraction et échecs
     """
-    # Je supprime les doublons
-    df = df.drop_duplicates()
-    
-    # Je nettoie les prix avant de les convertir en numérique
-    if 'Prix' in df.columns:
-        # Je garde seulement les chiffres du prix
-        df['Prix_nettoye'] = df['Prix'].str.replace(r'[^\d]', '', regex=True)
-        # Je convertis en numérique
-        df['Prix_nettoye'] = pd.to_numeric(df['Prix_nettoye'], errors='coerce').fillna(0).astype(int)
-    
-    # Je nettoie les adresses (supprime espaces superflus)
-    if 'Adresse' in df.columns:
-        df['Adresse'] = df['Adresse'].str.strip().str.replace(r'\s+', ' ', regex=True)
-    
-    # Je sélectionne et traite les colonnes numériques en une seule opération
-    colonne_numeriques = df.select_dtypes(include=['number']).columns
-    if len(colonne_numeriques) > 0:
-        df[colonne_numeriques] = df[colonne_numeriques].fillna(df[colonne_numeriques].median())
-    
-    # Je sélectionne et traite les colonnes textes en une seule opération
-    colonne_textes = df.select_dtypes(include=['object']).columns
-    if len(colonne_textes) > 0:
-        df[colonne_textes] = df[colonne_textes].fillna('N/A')
-    
-    # Je supprime les lignes complètement vides
-    df = df.dropna(how='all')
-    
-    return df
+    with st.expander("Diagnostics du scraper"):
+        mesures = METRIQUES.instantane()
+        compteurs = mesures['compteurs']
+        latence = mesures['histogrammes']['latence_requete_secondes']
+        analyse = mesures['histogrammes']['temps_analyse_secondes']
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Pages / seconde", f"{mesures['pages_par_seconde']:.2f}")
+        col2.metric("Requêtes réseau", int(compteurs.get('requetes', 0)), f"{int(compteurs.get('reponses_cache', 0))} depuis le cache")
+        col3.metric("Données téléchargées", f"{compteurs.get('octets_telecharges', 0) / 1024 ** 2:.1f} Mo")
+        col4.metric("Cartes extraites", f"{int(compteurs.get('cartes_extraites', 0))} / {int(compteurs.get('cartes_trouvees', 0))}")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        # Un quantile vide alors qu'il y a des mesures dépasse la dernière borne de l'histogramme
+        au_dela = f"> {latence['bornes'][-1]:g} s" if latence['total'] else "0 s"
+        col1.metric("Latence réseau p50", au_dela if latence['p50'] is None else f"{latence['p50']:g} s")
+        col2.metric("Latence réseau p99", au_dela if latence['p99'] is None else f"{latence['p99']:g} s")
+        col3.metric("Temps d'analyse total", f"{analyse['somme']:.2f} s")
+        col4.metric("Attente du limiteur", f"{compteurs.get('attente_limiteur_secondes', 0):.1f} s",
+                    f"{int(compteurs.get('ralentissements', 0))} ralentissements", delta_color="off")
+        
+        # J'affiche la répartition des latences réseau
+        if latence['total'] > 0:
+            st.caption("Répartition des latences réseau (secondes)")
+            libelles = [f"≤ {borne:g}" for borne in latence['bornes']] + [f"> {latence['bornes'][-1]:g}"]
+            st.bar_chart(pd.Series(latence['comptes'], index=libelles))
+        
+        if mesures['echecs']:
+            st.caption("Échecs par raison")
+            st.dataframe(pd.Series(mesures['echecs'], name="Nombre"), width='stretch')
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("Exporter (Prometheus)", METRIQUES.exporter_prometheus(), file_name="metriques.prom", mime="text/plain")
+        with col2:
+            st.download_button("Exporter (JSON)", METRIQUES.exporter_json(), file_name="metriques.json", mime="application/json")
+        with col3:
+            if st.button("Remettre à zéro"):
+                METRIQUES.reinitialiser()
 
 # OPTION 1: Scraper et nettoyer des données
 if option_choisie == "Scraper et nettoyer des données":
@@ -186,91 +236,72 @@ if option_choisie == "Scraper et nettoyer des données":
     # Je crée 4 colonnes pour les boutons
     col1, col2, col3, col4 = st.columns(4)
     
-    # Je réinitialise le flag de scraping si le nombre de pages change
-    if 'nombre_pages_precedent' not in st.session_state:
-        st.session_state.nombre_pages_precedent = nombre_pages
-    
-    if st.session_state.nombre_pages_precedent != nombre_pages:
-        st.session_state.nombre_pages_precedent = nombre_pages
-        # Je supprime la catégorie pour forcer un nouveau clic
-        if 'categorie' in st.session_state:
-            del st.session_state.categorie
-        if 'scraping_lance' in st.session_state:
-            del st.session_state.scraping_lance
-    
-    with col1:
-        if st.button("Données sur les chiens", width='stretch'):
-            st.session_state.categorie = "chiens"
-            st.session_state.scraping_lance = True
+    # Chaque bouton lance un scraping en arrière-plan (ou rejoint celui déjà lancé par une autre session)
+    boutons = [
+        (col1, "Données sur les chiens", "chiens"),
+        (col2, "Données sur les moutons", "moutons"),
+        (col3, "Poules, lapins et pigeons", "poules"),
+        (col4, "Autres animaux", "autres")
+    ]
+    for colonne, libelle, categorie in boutons:
+        with colonne:
+            if st.button(libelle, width='stretch'):
+                tache = obtenir_gestionnaire().lancer(categorie, st.session_state.nombre_pages, preferer_cache, mode_incremental,
+                                                      session=st.session_state.id_session)
+                st.session_state.id_tache = tache.id
+    
+    # J'affiche la tâche de la session si elle existe encore
+    tache = obtenir_gestionnaire().obtenir(st.session_state.get('id_tache'))
+    
+    if tache is not None:
+        en_cours = not tache.terminee
+        
+        # Tant que la tâche tourne, je rafraîchis seulement ce fragment toutes les 2 secondes
+        @st.fragment(run_every=2 if en_cours else None)
+        def afficher_tache():
+            # Quand la tâche se termine, je relance toute la page pour arrêter le rafraîchissement
+            if en_cours and tache.terminee:
+                st.rerun()
             
-    with col2:
-        if st.button("Données sur les moutons", width='stretch'):
-            st.session_state.categorie = "moutons"
-            st.session_state.scraping_lance = True
+            st.subheader(f"Scraping des données: {tache.categorie.capitalize()}")
             
-    with col3:
-        if st.button("Poules, lapins et pigeons", width='stretch'):
-            st.session_state.categorie = "poules"
-            st.session_state.scraping_lance = True            
-    with col4:
-        if st.button("Autres animaux", width='stretch'):
-            st.session_state.categorie = "autres"
-            st.session_state.scraping_lance = True
-    
-    # Je gère le scraping selon la catégorie choisie
-    if 'categorie' in st.session_state and 'scraping_lance' in st.session_state and st.session_state.scraping_lance:
-        categorie = st.session_state.categorie
-        
-        # Je définis les URLs et noms de colonnes
-        urls_config = {
-            "chiens": {
-                "url": "https://sn.coinafrique.com/categorie/chiens",
-                "nom_colonne": "Nom"
-            },
-            "moutons": {
-                "url": "https://sn.coinafrique.com/categorie/moutons",
-                "nom_colonne": "Nom"
-            },
-            "poules": {
-                "url": "https://sn.coinafrique.com/categorie/poules-lapins-et-pigeons",
-                "nom_colonne": "Details"
-            },
-            "autres": {
-                "url": "https://sn.coinafrique.com/categorie/autres-animaux",
-                "nom_colonne": "Nom"
-            }
-        }
-        
-        config = urls_config[categorie]
-        
-        st.subheader(f"Scraping des données: {categorie.capitalize()}")
-        
-        with st.spinner("Je scrape les données..."):
-            # Je scrape les données
-            donnees = scraper_categorie(
-                config['url'],
-                st.session_state.nombre_pages,
-                config['nom_colonne']
-            )
+            if not tache.terminee:
+                st.progress(tache.progression, text=tache.message)
+                # La tâche peut être partagée : elle ne s'arrête que si plus aucune autre session ne la suit
+                if st.button("Annuler le scraping"):
+                    if not tache.annuler(st.session_state.id_session):
+                        # D'autres sessions suivent encore la tâche : je la quitte sans l'arrêter
+                        del st.session_state.id_tache
+                        st.rerun()
+            
+            for erreur in tache.erreurs:
+                st.error(erreur)
             
-            if donnees:
-                # Je crée un DataFrame
-                df = pd.DataFrame(donnees)
-                
-                # Je nettoie les données
-                df_nettoye = nettoyer_donnees(df)
-                
-                st.success(f"J'ai scrapé {len(df_nettoye)} annonces!")
-                
-                # J'affiche les données
+            # J'affiche les dernières données nettoyées récupérées (toutes sont consultables depuis le dashboard)
+            df_tache = tache.apercu()
+            if df_tache is not None:
                 st.subheader("Données nettoyées")
-                st.dataframe(df_nettoye, width='stretch')
-                
-                # Je réinitialise le flag de scraping pour permettre un nouveau scraping
-                st.session_state.scraping_lance = False
-                
-            else:
-                st.warning("Aucune donnée n'a été scrapée. Le site a peut-être changé de structure.")
+                st.dataframe(df_tache, width='stretch')
+                if tache.lignes_recuperees > len(df_tache):
+                    st.caption(f"Les {len(df_tache)} dernières annonces sur {tache.lignes_recuperees} récupérées")
+            
+            if tache.terminee:
+                if tache.statut == ANNULEE:
+                    st.warning(f"Scraping annulé après {tache.pages_traitees} pages, {tache.lignes_ecrites} annonces ajoutées au stockage.")
+                elif df_tache is not None:
+                    st.success(f"J'ai scrapé {tache.lignes_ecrites} annonces et je les ai ajoutées au stockage ({tache.annonces_connues} annonces connues)!")
+                elif tache.incremental:
+                    st.info("Aucune nouvelle annonce depuis le dernier scraping.")
+                else:
+                    st.warning("Aucune donnée n'a été scrapée. Le site a peut-être changé de structure.")
+            
+            # Les mesures sont rafraîchies en même temps que la progression
+            afficher_diagnostics()
+        
+        afficher_tache()
+    
+    else:
+        afficher_diagnostics()
 
 # OPTION 2: Télécharger des données déjà scrapées
 elif option_choisie == "Télécharger des données déjà scrapées":
@@ -278,152 +309,57 @@ elif option_choisie == "Télécharger des données déjà scrapées":
     
     st.info("Cette section permet de télécharger des données qui ont été préalablement scrapées avec Web Scraper (extension Chrome).")
     
-    # Je définis les chemins vers les fichiers CSV
-    fichiers_csv = {
-        "chiens": "data/chiens.csv",
-        "moutons": "data/moutons.csv",
-        "poules": "data/poules.csv",
-        "autres": "data/autres.csv"
-    }
-    
-    # Je charge les données depuis les fichiers CSV
-    donnees_brutes = {}
-    fichiers_manquants = []
-    
-    for categorie, chemin in fichiers_csv.items():
-        try:
-            # Je charge le fichier CSV
-            df = pd.read_csv(chemin)
-            
-            # Je supprime les colonnes ajoutées par Web Scraper (web-scraper-order et web-scraper-start-url)
-            if 'web_scraper_order' in df.columns:
-                df = df.drop('web_scraper_order', axis=1)
-            if 'web_scraper_start_url' in df.columns:
-                df = df.drop('web_scraper_start_url', axis=1)
-            if 'lien_detail' in df.columns:
-                df = df.drop('lien_detail', axis=1)
-            
-            donnees_brutes[categorie] = df
-        except FileNotFoundError:
-            # Si le fichier n'existe pas, je note qu'il est manquant
-            fichiers_manquants.append(categorie)
-            donnees_brutes[categorie] = None
+    fichiers_manquants = categories_manquantes()
     
     # J'affiche un avertissement si des fichiers sont manquants
     if fichiers_manquants:
         st.warning(f"Fichiers manquants: {', '.join(fichiers_manquants)}. Veuillez scraper ces données avec Web Scraper et les placer dans le dossier 'data/'.")
     
-    # Je crée des onglets pour chaque catégorie
-    tab1, tab2, tab3, tab4 = st.tabs(["Chiens", "Moutons", "Poules/Lapins/Pigeons", "Autres animaux"])
-    
-    with tab1:
-        st.subheader("Données brutes - Chiens")
-        if donnees_brutes["chiens"] is not None:
-            st.dataframe(donnees_brutes["chiens"], use_container_width=True)
-            
-            # J'affiche le nombre de lignes
-            st.caption(f"{len(donnees_brutes['chiens'])} annonces trouvées")
-            
-            # Je permets le téléchargement
-            csv = donnees_brutes["chiens"].to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Télécharger (CSV)",
-                data=csv,
-                file_name="donnees_chiens_brutes.csv",
-                mime="text/csv",
-                key="btn_chiens"
-            )
-        else:
-            st.error("Fichier 'chiens.csv' non trouvé dans le dossier 'data/'")
-    
-    with tab2:
-        st.subheader("Données brutes - Moutons")
-        if donnees_brutes["moutons"] is not None:
-            st.dataframe(donnees_brutes["moutons"], use_container_width=True)
-            st.caption(f"{len(donnees_brutes['moutons'])} annonces trouvées")
-            
-            csv = donnees_brutes["moutons"].to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Télécharger (CSV)",
-                data=csv,
-                file_name="donnees_moutons_brutes.csv",
-                mime="text/csv",
-                key="btn_moutons"
-            )
-        else:
-            st.error("Fichier 'moutons.csv' non trouvé dans le dossier 'data/'")
-    
-    with tab3:
-        st.subheader("Données brutes - Poules/Lapins/Pigeons")
-        if donnees_brutes["poules"] is not None:
-            st.dataframe(donnees_brutes["poules"], use_container_width=True)
-            st.caption(f"{len(donnees_brutes['poules'])} annonces trouvées")
-            
-            csv = donnees_brutes["poules"].to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Télécharger (CSV)",
-                data=csv,
-                file_name="donnees_poules_brutes.csv",
-                mime="text/csv",
-                key="btn_poules"
-            )
-        else:
-            st.error("Fichier 'poules.csv' non trouvé dans le dossier 'data/'")
+    # Je n'affiche qu'une catégorie à la fois (les onglets rendraient les quatre tables à chaque rerun)
+    onglets = {
+        "chiens": "Chiens",
+        "moutons": "Moutons",
+        "poules": "Poules/Lapins/Pigeons",
+        "autres": "Autres animaux"
+    }
+    categorie = st.radio("Catégorie", list(onglets), format_func=onglets.get, horizontal=True)
     
-    with tab4:
-        st.subheader("Données brutes - Autres animaux")
-        if donnees_brutes["autres"] is not None:
-            st.dataframe(donnees_brutes["autres"], use_container_width=True)
-            st.caption(f"{len(donnees_brutes['autres'])} annonces trouvées")
+    st.subheader(f"Données brutes - {onglets[categorie]}")
+    table = table_navigation(categorie, brutes=True)
+    if table is None:
+        st.error(f"Fichier '{categorie}.csv' non trouvé dans le dossier 'data/'")
+    else:
+        afficher_navigateur(table, f"brutes_{categorie}")
+        
+        # Je construis le fichier seulement quand il est demandé, puis il reste en cache tant que le CSV ne change pas
+        format_export = st.selectbox(
+            "Format du fichier",
+            list(FORMATS_EXPORT),
+            format_func=lambda format_export: FORMATS_EXPORT[format_export][0],
+            key=f"format_{categorie}"
+        )
+        if st.button("Préparer le téléchargement", key=f"preparer_{categorie}"):
+            st.session_state[f"export_{categorie}"] = format_export
+        
+        if st.session_state.get(f"export_{categorie}") == format_export:
+            with st.spinner("Préparation du fichier..."):
+                contenu = exporter_donnees_brutes(categorie, format_export)
             
-            csv = donnees_brutes["autres"].to_csv(index=False).encode('utf-8')
+            libelle, mime = FORMATS_EXPORT[format_export]
             st.download_button(
-                label="Télécharger (CSV)",
-                data=csv,
-                file_name="donnees_autres_brutes.csv",
-                mime="text/csv",
-                key="btn_autres"
+                label=f"Télécharger ({libelle})",
+                data=contenu,
+                file_name=f"donnees_{categorie}_brutes.{format_export}",
+                mime=mime,
+                key=f"btn_{categorie}"
             )
-        else:
-            st.error("Fichier 'autres.csv' non trouvé dans le dossier 'data/'")
 
 # OPTION 3: Voir un dashboard des données
 elif option_choisie == "Voir un dashboard des données":
     st.header("Dashboard des données nettoyées")
     
-    # Je définis les chemins vers les fichiers CSV
-    fichiers_csv = {
-        "chiens": "data/chiens.csv",
-        "moutons": "data/moutons.csv",
-        "poules": "data/poules.csv",
-        "autres": "data/autres.csv"
-    }
-    
-    # Je charge et nettoie les données depuis les fichiers CSV
-    donnees_nettoyees = {}
-    fichiers_manquants = []
-    
-    for categorie, chemin in fichiers_csv.items():
-        try:
-            # Je charge le fichier CSV
-            df = pd.read_csv(chemin)
-            
-            # Je supprime les colonnes ajoutées par Web Scraper
-            if 'web_scraper_order' in df.columns:
-                df = df.drop('web_scraper_order', axis=1)
-            if 'web_scraper_start_url' in df.columns:
-                df = df.drop('web_scraper_start_url', axis=1)
-            if 'lien_detail' in df.columns:
-                df = df.drop('lien_detail', axis=1)
-            
-            # Je nettoie les données
-            df_nettoye = nettoyer_donnees(df)
-            
-            donnees_nettoyees[categorie] = df_nettoye
-        except FileNotFoundError:
-            # Si le fichier n'existe pas, je note qu'il est manquant
-            fichiers_manquants.append(categorie)
-            donnees_nettoyees[categorie] = None
+    # Je vérifie quels fichiers sont disponibles sans les charger
+    fichiers_manquants = categories_manquantes()
     
     # J'affiche un avertissement si des fichiers sont manquants
     if fichiers_manquants:
@@ -445,46 +381,49 @@ elif option_choisie == "Voir un dashboard des données":
     
     categorie_selectionnee = mapping[categorie_dashboard]
     
+    # Je prépare seulement la catégorie affichée (la copie SQLite n'est refaite que si le stockage a changé)
+    table = table_navigation(categorie_selectionnee)
+    
     # Je vérifie si les données sont disponibles
-    if donnees_nettoyees[categorie_selectionnee] is not None:
-        df_selected = donnees_nettoyees[categorie_selectionnee]
+    if table is not None:
         
-        # J'affiche le tableau de données
+        # J'affiche le tableau de données page par page
         st.subheader("Tableau des données")
-        st.dataframe(df_selected, use_container_width=True)
+        afficher_navigateur(table, f"dashboard_{categorie_selectionnee}")
         
-        # J'affiche un graphique simple avec les prix
-        if 'Prix_nettoye' in df_selected.columns:
-            st.subheader("Distribution des prix")
-            
-            # Je filtre les prix valides (supérieurs à 0)
-            df_prix = df_selected[df_selected['Prix_nettoye'] > 0].copy()
+        # Les graphiques utilisent les statistiques précalculées à chaque écriture, sans parcourir les données
+        agregats = charger_agregats(categorie_selectionnee)
+        
+        # J'affiche la distribution de tous les prix
+        st.subheader("Distribution des prix")
+        if agregats.nombre_prix() > 0:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Annonces avec prix", agregats.nombre_prix(), f"{agregats.lignes} annonces au total", delta_color="off")
+            col2.metric("Prix médian", f"{agregats.quantile(0.5):,} CFA".replace(',', ' '))
+            col3.metric("10 % des prix sous", f"{agregats.quantile(0.1):,} CFA".replace(',', ' '))
+            col4.metric("90 % des prix sous", f"{agregats.quantile(0.9):,} CFA".replace(',', ' '))
             
-            if len(df_prix) > 0:
-                # Je prends la première colonne (Nom ou Details) comme index
-                premiere_colonne = df_prix.columns[0]
-                
-                # Je limite à 20 premières lignes pour la lisibilité
-                if len(df_prix) > 20:
-                    df_prix = df_prix.head(20)
-                    st.caption("Affichage des 20 premières annonces")
-                
-                st.bar_chart(df_prix.set_index(premiere_colonne)['Prix_nettoye'])
-            else:
-                st.info("Aucun prix valide à afficher")
+            st.caption("Nombre d'annonces par tranche de prix (borne haute de la tranche, en CFA)")
+            st.bar_chart(agregats.repartition_prix())
+        else:
+            st.info("Aucun prix valide à afficher")
         
         # J'affiche la répartition par ville
-        if 'Adresse' in df_selected.columns:
-            st.subheader("Répartition géographique")
-            
-            # Je filtre les adresses valides
-            adresses_valides = df_selected[df_selected['Adresse'] != 'N/A']['Adresse']
-            
-            if len(adresses_valides) > 0:
-                ville_counts = adresses_valides.value_counts()
-                st.bar_chart(ville_counts)
-            else:
-                st.info("Aucune adresse valide à afficher")
+        st.subheader("Répartition géographique")
+        villes = agregats.villes(20)
+        if len(villes) > 0:
+            if len(agregats.villes()) > 20:
+                st.caption("Les 20 villes qui ont le plus d'annonces")
+            st.bar_chart(villes)
+        else:
+            st.info("Aucune adresse valide à afficher")
+        
+        # J'affiche le nombre de nouvelles annonces à chaque scraping
+        st.subheader("Nouvelles annonces par date de scraping")
+        st.line_chart(agregats.evolution())
+        
+        st.subheader("Galerie des annonces")
+        afficher_galerie(table, categorie_selectionnee)
     else:
         st.error(f"Fichier '{categorie_selectionnee}.csv' non trouvé dans le dossier 'data/'")
 
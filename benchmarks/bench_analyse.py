@@ -0,0 +1,90 @@
+"""
+Micro-benchmark du parsing des pages : ancienne extraction BeautifulSoup (html.parser)
+contre la nouvelle extraction lxml avec XPath compilés.
+
+Utilisation (depuis la racine du projet) :
+    python -m benchmarks.bench_analyse [dossier_de_pages_html] [--repetitions 20]
+
+Sans dossier, j'utilise les pages enregistrées dans data/cache/http, ou des pages synthétiques.
+"""
+import argparse
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup as bs
+
+from analyse import extraire_cartes
+from benchmarks.pages_synthetiques import page_liste
+
+
+# Ancienne extraction, gardée comme référence
+def extraire_cartes_reference(contenu):
+    soup = bs(contenu, 'html.parser')
+    cartes = []
+    for carte in soup.find_all('div', 'col s6 m4 l3'):
+        try:
+            description = carte.find('p', 'ad__card-description')
+            prix = carte.find('p', class_='ad__card-price').text.strip('CFA')
+            adresse = carte.find('p', class_='ad__card-location').find('span').text.strip()
+            image_lien = carte.find('img', 'ad__card-img').get('src')
+            lien_element = carte.find('a', 'card-image ad__card-image waves-block waves-light')
+            cartes.append({
+                'nom': description.text.strip() if description else None,
+                'prix': prix,
+                'adresse': adresse,
+                'image_lien': image_lien,
+                'lien_detail': 'https://sn.coinafrique.com' + lien_element.get('href') if lien_element else None
+            })
+        except Exception:
+            continue
+    return cartes
+
+
+def charger_pages(dossier):
+    # Je garde seulement les pages de liste (celles qui contiennent des cartes)
+    pages = []
+    for chemin in sorted(glob.glob(os.path.join(dossier, '*.html'))):
+        with open(chemin, 'rb') as f:
+            contenu = f.read()
+        if b'ad__card-price' in contenu:
+            pages.append(contenu)
+    return pages
+
+
+def mesurer(fonction, pages, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        for contenu in pages:
+            fonction(contenu)
+    return (time.perf_counter() - debut) / (repetitions * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dossier', nargs='?', default='data/cache/http')
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = charger_pages(args.dossier) if os.path.isdir(args.dossier) else []
+    origine = args.dossier
+    if not pages:
+        pages = [page_liste('chiens', page_num) for page_num in range(1, 11)]
+        origine = 'pages synthétiques'
+
+    # Je vérifie d'abord que les deux extractions renvoient les mêmes lignes
+    for contenu in pages:
+        if extraire_cartes(contenu) != extraire_cartes_reference(contenu):
+            raise SystemExit("Les deux extractions ne renvoient pas les mêmes lignes")
+
+    avant = mesurer(extraire_cartes_reference, pages, args.repetitions)
+    apres = mesurer(extraire_cartes, pages, args.repetitions)
+
+    print(f"{len(pages)} pages ({origine}), {args.repetitions} répétitions")
+    print(f"BeautifulSoup html.parser : {avant * 1000:8.2f} ms / page")
+    print(f"lxml + XPath compilés     : {apres * 1000:8.2f} ms / page")
+    print(f"Accélération              : x{avant / apres:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark de bout en bout sur le serveur factice : scraping, nettoyage, stockage et dashboard.
+
+Utilisation (depuis la racine du projet) :
+    python -m benchmarks.bench_bout_en_bout [--pages 1 10 100] [--latence 0.05] [--taux-erreur 0.0]
+    python -m benchmarks.bench_bout_en_bout --politesse [--crawl-delay 0.5]
+
+Par défaut le débit est fixé par un seau à jetons (--debit) pour mesurer le code seul.
+Avec --politesse, le scraper utilise son vrai planificateur (AIMD, robots.txt du serveur factice).
+Chaque scénario tourne dans un processus neuf pour que le pic de mémoire (RSS) soit propre à ce scénario.
+Je rapporte les pages / seconde, les latences p50 / p99 des requêtes et le pic RSS.
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from agregats import Agregats
+from benchmarks.serveur_factice import ServeurFactice
+from client_http import ClientHTTP
+from index_annonces import IndexAnnonces
+from metriques import METRIQUES
+from nettoyage import nettoyer_donnees
+from politesse import PlanificateurPolitesse
+from recuperation import LimiteurDebit
+from scraper import (CONCURRENCE_MAX, FACTEUR_LENTEUR, REQUETES_PAR_SECONDE, REQUETES_PAR_SECONDE_GLOBAL,
+                     REQUETES_PAR_SECONDE_MAX, URLS_CONFIG, iterer_pages)
+from stockage import EcrivainParLots
+
+# Je garde le chemin de l'URL réelle, seul l'hôte change
+CHEMINS_CATEGORIES = {categorie: config['url'].replace('https://sn.coinafrique.com', '') for categorie, config in URLS_CONFIG.items()}
+
+
+def percentile(valeurs, q):
+    if not valeurs:
+        return 0.0
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+
+
+def pic_rss_mo():
+    # ru_maxrss est en kilo-octets sous Linux et en octets sous macOS
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / 1024 ** 2 if sys.platform == 'darwin' else pic / 1024
+
+
+# Fonction exécutée dans un processus séparé pour chaque scénario
+def scenario(categorie, nombre_pages, latence, taux_erreur, debit, politesse=False, crawl_delay=0):
+    serveur = ServeurFactice(latence=latence, taux_erreur=taux_erreur, crawl_delay=crawl_delay)
+    url_base = serveur.demarrer()
+
+    if politesse:
+        # Le même planificateur que le scraper (voir creer_client), qui lit le robots.txt du serveur factice
+        limiteur = PlanificateurPolitesse(
+            debit_initial=REQUETES_PAR_SECONDE,
+            debit_max=REQUETES_PAR_SECONDE_MAX,
+            debit_global_max=REQUETES_PAR_SECONDE_GLOBAL,
+            facteur_lenteur=FACTEUR_LENTEUR
+        )
+    else:
+        limiteur = LimiteurDebit(debit, rafale=CONCURRENCE_MAX)
+
+    # Pas de cache disque : je mesure le réseau et le code, pas le disque
+    client = ClientHTTP(taille_pool=CONCURRENCE_MAX * 2, facteur_attente=0.1, limiteur=limiteur)
+
+    # Je mesure chaque requête côté client
+    latences = []
+    get_origine = client.get
+
+    def get_mesure(url, **options):
+        debut = time.perf_counter()
+        try:
+            return get_origine(url, **options)
+        finally:
+            latences.append(time.perf_counter() - debut)
+
+    client.get = get_mesure
+
+    config = URLS_CONFIG[categorie]
+    with tempfile.TemporaryDirectory() as dossier:
+        index = IndexAnnonces(categorie, dossier=dossier)
+        agregats = Agregats(categorie, dossier=dossier, dossier_parquet=dossier)
+        ecrivain = EcrivainParLots(categorie, index=index, agregats=agregats, dossier=dossier)
+
+        debut = time.perf_counter()
+        duree_nettoyage = 0.0
+        pages_en_erreur = 0
+        for page_num, items_page, erreur in iterer_pages(client, url_base + CHEMINS_CATEGORIES[categorie], nombre_pages, config['nom_colonne']):
+            if erreur is not None:
+                pages_en_erreur += 1
+            if items_page:
+                debut_nettoyage = time.perf_counter()
+                ecrivain.ajouter(nettoyer_donnees(pd.DataFrame(items_page)))
+                duree_nettoyage += time.perf_counter() - debut_nettoyage
+        ecrivain.vider()
+        index.fermer()
+        duree_scraping = time.perf_counter() - debut
+
+        # Je rejoue le chemin du dashboard : lecture des statistiques précalculées, prix médian et répartition par ville
+        debut = time.perf_counter()
+        statistiques = Agregats(categorie, dossier=dossier, dossier_parquet=dossier)
+        statistiques.quantile(0.5)
+        statistiques.repartition_prix()
+        repartition = statistiques.villes()
+        duree_dashboard = time.perf_counter() - debut
+
+    serveur.arreter()
+    client.fermer()
+
+    return {
+        'categorie': categorie,
+        'pages': nombre_pages,
+        'pages_en_erreur': pages_en_erreur,
+        'ralentissements': int(METRIQUES.compteurs.get('ralentissements', 0)),
+        'annonces': ecrivain.lignes_ecrites,
+        'requetes': len(latences),
+        'pages_par_seconde': nombre_pages / duree_scraping,
+        'p50_ms': percentile(latences, 0.5) * 1000,
+        'p99_ms': percentile(latences, 0.99) * 1000,
+        'moyenne_ms': statistics.fmean(latences) * 1000 if latences else 0.0,
+        'nettoyage_s': duree_nettoyage,
+        'dashboard_ms': duree_dashboard * 1000,
+        'prix_valides': statistiques.nombre_prix(),
+        'villes': len(repartition),
+        'pic_rss_mo': pic_rss_mo()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--categories', nargs='+', default=['chiens', 'poules'], choices=list(URLS_CONFIG))
+    parser.add_argument('--latence', type=float, default=0.05, help="latence moyenne simulée (secondes)")
+    parser.add_argument('--taux-erreur', type=float, default=0.0, help="proportion de réponses 503")
+    parser.add_argument('--debit', type=float, default=1000.0, help="requêtes / seconde autorisées par le limiteur")
+    parser.add_argument('--politesse', action='store_true', help="utiliser le vrai planificateur du scraper au lieu du limiteur fixe")
+    parser.add_argument('--crawl-delay', type=float, default=0, help="Crawl-delay annoncé par le robots.txt du serveur factice")
+    args = parser.parse_args()
+
+    resultats = []
+    contexte = multiprocessing.get_context('spawn')
+    for categorie in args.categories:
+        for nombre_pages in args.pages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexte) as executeur:
+                resultat = executeur.submit(scenario, categorie, nombre_pages, args.latence, args.taux_erreur, args.debit,
+                                           args.politesse, args.crawl_delay).result()
+            resultats.append(resultat)
+            print(f"{categorie:8} {nombre_pages:4} pages : {resultat['pages_par_seconde']:7.2f} pages/s, "
+                  f"p50 {resultat['p50_ms']:7.1f} ms, p99 {resultat['p99_ms']:7.1f} ms, "
+                  f"pic RSS {resultat['pic_rss_mo']:6.1f} Mo", flush=True)
+
+    print()
+    print(pd.DataFrame(resultats).to_string(index=False, float_format=lambda valeur: f"{valeur:.2f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark du nettoyage : ancienne version de nettoyer_donnees contre la version actuelle,
+sur une table synthétique (1 000 000 de lignes par défaut).
+
+Utilisation (depuis la racine du projet) :
+    python -m benchmarks.bench_nettoyage [--lignes 1000000]
+
+Je mesure le débit (lignes / seconde) et le pic mémoire alloué (tracemalloc).
+"""
+import argparse
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.pages_synthetiques import NOMS, VILLES
+from nettoyage import nettoyer_donnees
+
+
+# Ancienne version, gardée comme référence
+def nettoyer_donnees_reference(df):
+    df = df.drop_duplicates()
+    if 'Prix' in df.columns:
+        df['Prix_nettoye'] = df['Prix'].str.replace(r'[^\d]', '', regex=True)
+        df['Prix_nettoye'] = pd.to_numeric(df['Prix_nettoye'], errors='coerce').fillna(0).astype(int)
+    if 'Adresse' in df.columns:
+        df['Adresse'] = df['Adresse'].str.strip().str.replace(r'\s+', ' ', regex=True)
+    colonne_numeriques = df.select_dtypes(include=['number']).columns
+    if len(colonne_numeriques) > 0:
+        df[colonne_numeriques] = df[colonne_numeriques].fillna(df[colonne_numeriques].median())
+    colonne_textes = df.select_dtypes(include=['object']).columns
+    if len(colonne_textes) > 0:
+        df[colonne_textes] = df[colonne_textes].fillna('N/A')
+    df = df.dropna(how='all')
+    return df
+
+
+def table_synthetique(lignes, graine=0):
+    # Je reproduis la forme des données scrapées : peu de valeurs distinctes pour les prix et les adresses
+    aleatoire = np.random.default_rng(graine)
+    prix_possibles = np.array([f"{p * 1000:,}".replace(',', ' ') + "CFA" for p in range(1, 2001)] + ["Prix sur demande"])
+    return pd.DataFrame({
+        'Nom': aleatoire.choice(np.array(NOMS, dtype=object), lignes),
+        'Prix': aleatoire.choice(prix_possibles.astype(object), lignes),
+        'Adresse': aleatoire.choice(np.array(VILLES + [None, "  Dakar ,  Sénégal "], dtype=object), lignes),
+        'Image_lien': [f"https://images.coinafrique.com/thumb_{i}_uploaded_image1.jpg" for i in range(lignes)]
+    })
+
+
+def mesurer(fonction, df):
+    copie = df.copy()
+    tracemalloc.start()
+    debut = time.perf_counter()
+    fonction(copie)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duree, pic
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lignes', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = table_synthetique(args.lignes)
+
+    # L'ancienne version modifie une tranche : je masque les avertissements SettingWithCopy
+    warnings.simplefilter('ignore')
+
+    print(f"{args.lignes:,} lignes".replace(',', ' '))
+    for nom, fonction in [("Ancienne version", nettoyer_donnees_reference), ("Version actuelle", nettoyer_donnees)]:
+        duree, pic = mesurer(fonction, df)
+        print(f"{nom:18} : {duree:6.2f} s, {args.lignes / duree:12,.0f} lignes/s, pic mémoire {pic / 1024 ** 2:8.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
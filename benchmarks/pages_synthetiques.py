@@ -0,0 +1,64 @@
+"""
+Génère des pages HTML qui reproduisent la structure de sn.coinafrique.com
+"""
+import random
+import zlib
+
+VILLES = [
+    "Dakar, Sénégal", "Fann, Dakar, Sénégal", "Medina, Dakar, Sénégal", "Thies, Sénégal",
+    "Mbour, Sénégal", "Rufisque, Dakar, Sénégal", "Saint-Louis, Sénégal", "Sénégal"
+]
+NOMS = ["Chiots Berger Allemand", "Mouton Ladoum", "Poulets de chair", "Lapins angora", "Cheval", "Pigeons voyageurs"]
+
+
+def _premier_id(categorie):
+    # Chaque catégorie a sa propre plage d'identifiants, comme sur le site :
+    # sinon la déduplication entre catégories supprimerait des catégories entières
+    return (1 + zlib.crc32(categorie.encode('utf-8')) % 1000) * 10_000_000
+
+
+# Fonction pour générer une page de liste avec des cartes d'annonces
+def page_liste(categorie, page_num, nombre_cartes=84, graine=None):
+    """
+    Renvoie le HTML (bytes) d'une page de liste avec nombre_cartes annonces
+    """
+    aleatoire = random.Random(graine if graine is not None else page_num)
+    cartes = []
+    for i in range(nombre_cartes):
+        id_annonce = _premier_id(categorie) - page_num * 1000 - i
+        prix = "Prix sur demande" if aleatoire.random() < 0.1 else f"{aleatoire.randint(1, 900) * 1000:,}".replace(',', ' ') + "CFA"
+        cartes.append(f"""
+        <div class="col s6 m4 l3">
+          <div class="card ad__card round small hoverable undefined">
+            <a class="card-image ad__card-image waves-block waves-light" href="/annonce/{categorie}/annonce-{id_annonce}">
+              <img class="ad__card-img" src="https://images.coinafrique.com/thumb_{id_annonce}_uploaded_image1_1672496527.jpg" alt="">
+            </a>
+            <div class="card-content">
+              <p class="ad__card-description"><a href="/annonce/{categorie}/annonce-{id_annonce}">{aleatoire.choice(NOMS)}</a></p>
+              <p class="ad__card-price"><a href="/annonce/{categorie}/annonce-{id_annonce}">{prix}</a></p>
+              <p class="ad__card-location"><span>{aleatoire.choice(VILLES)}</span><span class="valign-wrapper"><i class="material-icons">location_on</i></span></p>
+            </div>
+          </div>
+        </div>""")
+
+    return f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>{categorie} - page {page_num}</title>
+<script>{'var x = 1;' * 500}</script></head>
+<body><nav>{'<a href="#">lien</a>' * 200}</nav>
+<div class="row adcards__listing">{''.join(cartes)}
+</div>
+<footer>{'<p>pied de page</p>' * 100}</footer></body></html>""".encode('utf-8')
+
+
+# Fonction pour générer une page de détail d'annonce
+def page_detail(id_annonce):
+    """
+    Renvoie le HTML (bytes) d'une page de détail d'annonce
+    """
+    return f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>Annonce {id_annonce}</title></head>
+<body><div class="ad__info">
+<div class="ad__info__box ad__info__box-descriptions">
+<p>Détails du produit</p>
+<p>Annonce {id_annonce} : animaux en bonne santé, livraison possible partout à Dakar.</p>
+</div></div></body></html>""".encode('utf-8')
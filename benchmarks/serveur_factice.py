@@ -0,0 +1,139 @@
+"""
+Serveur HTTP local qui imite sn.coinafrique.com pour mesurer le scraper sans toucher au vrai site.
+
+Utilisation autonome (depuis la racine du projet) :
+    python -m benchmarks.serveur_factice --port 8765 --latence 0.2 --taux-erreur 0.05
+
+Les pages viennent d'un dossier de pages enregistrées (--pages-enregistrees, par exemple
+data/cache/http) si l'URL y est, sinon elles sont générées par pages_synthetiques.
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.pages_synthetiques import page_detail, page_liste
+
+MOTIF_LISTE = re.compile(r'^/categorie/([\w-]+)/?$')
+MOTIF_DETAIL = re.compile(r'^/annonce/[\w-]+/[\w-]*?(\d+)/?$')
+
+
+# Classe qui répond aux requêtes comme le site réel
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Les en-têtes et le corps partent en deux écritures : avec Nagle et l'ACK retardé du client,
+    # chaque requête keep-alive attendrait environ 40 ms de plus
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Je n'affiche pas chaque requête : cela fausserait les mesures
+        pass
+
+    def do_GET(self):
+        serveur = self.server
+
+        # Je simule la latence du site, avec un peu de variation
+        if serveur.latence > 0:
+            time.sleep(random.uniform(0.5, 1.5) * serveur.latence)
+
+        # J'injecte des erreurs pour vérifier les réessais et la politesse
+        if serveur.taux_erreur > 0 and random.random() < serveur.taux_erreur:
+            self._repondre(503, b'Service indisponible', {'Retry-After': '1'})
+            return
+
+        url = urlparse(self.path)
+
+        if url.path == '/robots.txt':
+            self._repondre(200, f"User-agent: *\nCrawl-delay: {serveur.crawl_delay:g}\n".encode('utf-8'),
+                           {'Content-Type': 'text/plain'})
+            return
+
+        contenu = serveur.page_enregistree(self.path)
+        if contenu is None:
+            liste = MOTIF_LISTE.match(url.path)
+            detail = MOTIF_DETAIL.match(url.path)
+            if liste:
+                page_num = int(parse_qs(url.query).get('page', ['1'])[0])
+                contenu = page_liste(liste.group(1), page_num, serveur.cartes_par_page)
+            elif detail:
+                contenu = page_detail(detail.group(1))
+            else:
+                self._repondre(404, b'Introuvable')
+                return
+
+        self._repondre(200, contenu, {'Content-Type': 'text/html; charset=utf-8'})
+
+    def _repondre(self, statut, contenu, entetes=None):
+        self.send_response(statut)
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.send_header('Content-Length', str(len(contenu)))
+        self.end_headers()
+        self.wfile.write(contenu)
+
+
+# Classe du serveur factice, avec ses paramètres de latence et d'erreurs
+class ServeurFactice(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latence=0.0, taux_erreur=0.0, cartes_par_page=84, crawl_delay=0,
+                 pages_enregistrees=None):
+        super().__init__(('127.0.0.1', port), GestionnaireRequetes)
+        self.latence = latence
+        self.taux_erreur = taux_erreur
+        self.cartes_par_page = cartes_par_page
+        self.crawl_delay = crawl_delay
+        self.pages_enregistrees = pages_enregistrees
+
+    @property
+    def url_base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def page_enregistree(self, chemin):
+        # Je retrouve une page du cache HTTP à partir de l'URL réelle du site
+        if not self.pages_enregistrees:
+            return None
+        cle = hashlib.sha256(f"https://sn.coinafrique.com{chemin}".encode('utf-8')).hexdigest()
+        fichier = os.path.join(self.pages_enregistrees, cle + '.html')
+        if not os.path.exists(fichier):
+            return None
+        with open(fichier, 'rb') as f:
+            return f.read()
+
+    def demarrer(self):
+        """
+        Démarre le serveur dans un thread et renvoie son URL de base
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.url_base
+
+    def arreter(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latence', type=float, default=0.2, help="latence moyenne par requête (secondes)")
+    parser.add_argument('--taux-erreur', type=float, default=0.0, help="proportion de réponses 503")
+    parser.add_argument('--cartes-par-page', type=int, default=84)
+    parser.add_argument('--pages-enregistrees', help="dossier de pages enregistrées (cache HTTP)")
+    args = parser.parse_args()
+
+    serveur = ServeurFactice(args.port, args.latence, args.taux_erreur, args.cartes_par_page,
+                             pages_enregistrees=args.pages_enregistrees)
+    print(f"Serveur factice sur {serveur.url_base}/categorie/chiens (Ctrl-C pour arrêter)")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        serveur.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import os
+import threading
+
+
+# Classe de base des caches gardés sur le disque
+class CacheDisque:
+    """
+    Cache disque limité en taille : écritures atomiques, taille suivie en mémoire
+    et éviction des fichiers les moins récemment utilisés (LRU).
+    Seuls les fichiers qui finissent par extension comptent dans la taille ;
+    les fichiers qui finissent par extension_meta (même nom) sont supprimés avec eux.
+    """
+
+    extension = None
+    extension_meta = '.json'
+
+    def __init__(self, dossier, taille_max):
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self._verrou = threading.Lock()
+
+        os.makedirs(self.dossier, exist_ok=True)
+
+        # Je calcule une seule fois la taille actuelle du cache
+        self._taille = sum(os.path.getsize(chemin) for chemin, _ in self._fichiers())
+
+    def _fichiers(self):
+        for nom in os.listdir(self.dossier):
+            if nom.endswith(self.extension):
+                chemin = os.path.join(self.dossier, nom)
+                yield chemin, os.path.getmtime(chemin)
+
+    def _ecrire_atomique(self, chemin, donnees):
+        # J'écris dans un fichier temporaire puis je le renomme pour rester cohérent en cas d'arrêt
+        temporaire = f"{chemin}.{threading.get_ident()}.tmp"
+        with open(temporaire, 'wb') as f:
+            f.write(donnees)
+        os.replace(temporaire, chemin)
+
+    def _ajouter_taille(self, difference):
+        with self._verrou:
+            self._taille += difference
+            if self._taille > self.taille_max:
+                self._evincer()
+
+    def _evincer(self):
+        # Je supprime les entrées les moins récemment utilisées jusqu'à repasser sous 90 % de la limite
+        for chemin, _ in sorted(self._fichiers(), key=lambda fichier: fichier[1]):
+            if self._taille <= self.taille_max * 0.9:
+                break
+            try:
+                taille = os.path.getsize(chemin)
+                os.remove(chemin)
+                os.remove(chemin[:-len(self.extension)] + self.extension_meta)
+            except OSError:
+                continue
+            self._taille -= taille
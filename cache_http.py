@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import time
+
+from cache_disque import CacheDisque
+
+
+# Classe qui imite les attributs de requests.Response utilisés par le scraper
+class ReponseEnCache:
+    """
+    Réponse HTTP relue depuis le cache disque
+    """
+
+    def __init__(self, url, content, headers):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.headers = headers
+        self.depuis_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def raise_for_status(self):
+        pass
+
+
+# Classe pour garder les réponses HTTP sur le disque entre deux scrapings
+class CacheHTTP(CacheDisque):
+    """
+    Cache disque des réponses HTTP, indexé par URL, avec durée de vie,
+    revalidation conditionnelle (ETag / Last-Modified) et éviction LRU par taille
+    """
+
+    extension = '.html'
+
+    def __init__(self, dossier='data/cache/http', duree_vie=3600, taille_max=200 * 1024 * 1024):
+        self.duree_vie = duree_vie
+        super().__init__(dossier, taille_max)
+
+    def _chemins(self, url):
+        cle = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.dossier, cle)
+        return base + '.html', base + '.json'
+
+    def lire(self, url):
+        """
+        Renvoie l'entrée (métadonnées, contenu) de l'URL, ou None si elle n'est pas en cache
+        """
+        chemin_contenu, chemin_meta = self._chemins(url)
+        try:
+            with open(chemin_meta, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(chemin_contenu, 'rb') as f:
+                contenu = f.read()
+        except (OSError, ValueError):
+            return None
+
+        # Je marque l'entrée comme récemment utilisée pour l'éviction LRU
+        os.utime(chemin_contenu)
+        return meta, contenu
+
+    def est_frais(self, meta):
+        """
+        Indique si l'entrée peut être servie sans revalidation
+        """
+        return time.time() - meta['enregistre_le'] < self.duree_vie
+
+    def entetes_conditionnels(self, meta):
+        """
+        Construit les en-têtes de revalidation à partir des validateurs stockés
+        """
+        entetes = {}
+        if meta.get('etag'):
+            entetes['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            entetes['If-Modified-Since'] = meta['last_modified']
+        return entetes
+
+    def ecrire(self, url, response):
+        """
+        Enregistre une réponse réseau avec ses validateurs
+        """
+        chemin_contenu, chemin_meta = self._chemins(url)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'entetes': {'Content-Type': response.headers.get('Content-Type', '')},
+            'enregistre_le': time.time()
+        }
+
+        ancienne_taille = os.path.getsize(chemin_contenu) if os.path.exists(chemin_contenu) else 0
+
+        self._ecrire_atomique(chemin_contenu, response.content)
+        self._ecrire_atomique(chemin_meta, json.dumps(meta).encode('utf-8'))
+        self._ajouter_taille(len(response.content) - ancienne_taille)
+
+    def rafraichir(self, url, meta):
+        """
+        Prolonge la durée de vie d'une entrée revalidée par un 304
+        """
+        _, chemin_meta = self._chemins(url)
+        meta['enregistre_le'] = time.time()
+        self._ecrire_atomique(chemin_meta, json.dumps(meta).encode('utf-8'))
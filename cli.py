@@ -0,0 +1,97 @@
+"""
+Scraping en ligne de commande, sans Streamlit (par exemple depuis cron).
+
+Exemples (depuis la racine du projet) :
+    python cli.py                                  # toutes les catégories, 1 page
+    python cli.py chiens moutons --pages 10        # deux catégories en même temps
+    python cli.py --incremental --pages 50         # seulement les nouvelles annonces
+    python cli.py poules --export data/exports     # exporte aussi le stockage en CSV
+    python cli.py --export data/exports --format parquet
+
+Crontab pour un scraping incrémental chaque nuit à 3 h :
+    0 3 * * * cd /chemin/vers/web_scraping_app && python cli.py --incremental --pages 50
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from export import FORMATS_EXPORT
+from metriques import METRIQUES
+from scraper import CONCURRENCE_MAX, URLS_CONFIG, creer_client
+from stockage import exporter_fichier
+from taches import ECHOUEE, GestionnaireTaches
+
+
+def lire_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('categories', nargs='*',
+                        help=f"catégories à scraper parmi {', '.join(URLS_CONFIG)} (toutes par défaut)")
+    parser.add_argument('--pages', type=int, default=1, help="nombre de pages par catégorie")
+    parser.add_argument('--incremental', action='store_true', help="s'arrêter aux annonces déjà vues")
+    parser.add_argument('--cache', action='store_true', help="rejouer les pages en cache sans contacter le site")
+    parser.add_argument('--workers', type=int, default=CONCURRENCE_MAX * 2,
+                        help="nombre de requêtes HTTP simultanées, partagées par toutes les catégories")
+    parser.add_argument('--export', '--export-csv', dest='export', metavar='DOSSIER',
+                        help="exporter chaque catégorie dans ce dossier")
+    parser.add_argument('--format', choices=list(FORMATS_EXPORT), default='csv', help="format des fichiers exportés")
+    parser.add_argument('--metriques', metavar='FICHIER',
+                        help="écrire les mesures du scraping (.json, sinon format texte Prometheus)")
+    args = parser.parse_args(arguments)
+
+    inconnues = [categorie for categorie in args.categories if categorie not in URLS_CONFIG]
+    if inconnues:
+        parser.error(f"catégories inconnues : {', '.join(inconnues)}")
+    return args
+
+
+def main(arguments=None):
+    args = lire_arguments(arguments)
+    categories = args.categories or list(URLS_CONFIG)
+
+    client = creer_client()
+    executeur_requetes = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="requetes")
+
+    # Je lance toutes les catégories en même temps, leurs requêtes passent par le même pool
+    gestionnaire = GestionnaireTaches(client, nombre_workers=len(categories), executeur_requetes=executeur_requetes)
+    taches = [gestionnaire.lancer(categorie, args.pages, args.cache, args.incremental) for categorie in categories]
+
+    debut = time.perf_counter()
+    try:
+        while not all(tache.terminee for tache in taches):
+            time.sleep(1)
+            resume = ", ".join(f"{tache.categorie} {tache.pages_traitees}/{tache.nombre_pages}" for tache in taches)
+            print(f"\r[{time.perf_counter() - debut:6.0f} s] {resume}", end='', flush=True)
+    except KeyboardInterrupt:
+        # J'annule proprement : les lots déjà récupérés sont quand même écrits
+        for tache in taches:
+            tache.annuler()
+        while not all(tache.terminee for tache in taches):
+            time.sleep(0.5)
+    finally:
+        print()
+        executeur_requetes.shutdown(wait=False, cancel_futures=True)
+        client.fermer()
+
+    for tache in taches:
+        print(f"{tache.categorie:8} : {tache.statut}, {tache.pages_traitees} pages, "
+              f"{tache.lignes_ecrites} annonces ajoutées ({tache.annonces_connues} connues)")
+        for erreur in tache.erreurs:
+            print(f"    {erreur}", file=sys.stderr)
+
+        if args.export:
+            os.makedirs(args.export, exist_ok=True)
+            exporter_fichier(tache.categorie, os.path.join(args.export, f"{tache.categorie}.{args.format}"), args.format)
+
+    if args.metriques:
+        contenu = METRIQUES.exporter_json() if args.metriques.endswith('.json') else METRIQUES.exporter_prometheus()
+        with open(args.metriques, 'w', encoding='utf-8') as f:
+            f.write(contenu)
+
+    # Je renvoie un code d'erreur si une catégorie a échoué, pour que cron le signale
+    return 1 if any(tache.statut == ECHOUEE for tache in taches) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cache_http import ReponseEnCache
+from metriques import METRIQUES
+
+# J'annonce br seulement si urllib3 sait le décompresser
+try:
+    import brotli  # noqa: F401
+    ENCODAGES_ACCEPTES = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ENCODAGES_ACCEPTES = 'gzip, deflate, br'
+    except ImportError:
+        ENCODAGES_ACCEPTES = 'gzip, deflate'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Codes HTTP pour lesquels urllib3 réessaie la requête
+STATUTS_A_REESSAYER = (500, 502, 504)
+
+# Codes HTTP de surcharge : avec un limiteur adaptatif je les réessaie moi-même pour qu'il puisse ralentir,
+# sinon urllib3 les réessaie avec son attente exponentielle
+STATUTS_SURCHARGE = (429, 503)
+
+
+def _octets_recus(response):
+    # Je compte les octets reçus du réseau (corps compressé), pas la taille du contenu décompressé
+    contenu = response.content
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError):
+        return len(contenu)
+
+
+# Classe pour partager une session HTTP entre toutes les requêtes du scraper
+class ClientHTTP:
+    """
+    Client HTTP avec pool de connexions, keep-alive, compression et réessais
+    """
+
+    def __init__(self, taille_pool=10, tentatives=3, facteur_attente=0.5,
+                 delai_connexion=5, delai_lecture=15, limiteur=None, cache=None, metriques=METRIQUES):
+        self.timeout = (delai_connexion, delai_lecture)
+        # Les mesures du scraper par défaut ; les images ont les leurs
+        self.metriques = metriques
+        self.tentatives = tentatives
+        self.limiteur = limiteur
+        self.cache = cache
+
+        # Un limiteur adaptatif doit voir chaque 429/503 et leur Retry-After : urllib3 ne doit pas les réessayer à sa place
+        self._surcharge_geree_par_limiteur = getattr(limiteur, 'adaptatif', False)
+
+        # Je configure les réessais avec une attente exponentielle et le respect de Retry-After
+        reessais = Retry(
+            total=tentatives,
+            backoff_factor=facteur_attente,
+            status_forcelist=STATUTS_A_REESSAYER if self._surcharge_geree_par_limiteur else STATUTS_A_REESSAYER + STATUTS_SURCHARGE,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=not self._surcharge_geree_par_limiteur,
+            raise_on_status=False
+        )
+
+        # Je garde les connexions ouvertes et je les réutilise d'une requête à l'autre
+        adaptateur = HTTPAdapter(
+            pool_connections=taille_pool,
+            pool_maxsize=taille_pool,
+            max_retries=reessais
+        )
+
+        self.session = requests.Session()
+        self.session.mount('http://', adaptateur)
+        self.session.mount('https://', adaptateur)
+
+        # Je fixe les en-têtes une seule fois pour toute la session
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': ENCODAGES_ACCEPTES,
+            'Connection': 'keep-alive'
+        })
+
+    def get(self, url, timeout=None, preferer_cache=False):
+        """
+        Récupère une URL en respectant le limiteur de débit et lève une erreur si le statut est mauvais.
+        Avec preferer_cache, toute entrée en cache est servie sans contacter le serveur (rejeu hors ligne).
+        """
+        entree = self.cache.lire(url) if self.cache is not None else None
+        entetes = {}
+
+        if entree is not None:
+            meta, contenu = entree
+            # Je sers directement le cache s'il est encore frais ou si on rejoue hors ligne
+            if preferer_cache or self.cache.est_frais(meta):
+                self.metriques.incrementer('reponses_cache')
+                return ReponseEnCache(url, contenu, meta.get('entetes', {}))
+            # Sinon je demande au serveur si la page a changé
+            entetes = self.cache.entetes_conditionnels(meta)
+
+        for tentative in range(self.tentatives + 1):
+            if self.limiteur is not None:
+                self.metriques.incrementer('attente_limiteur_secondes', self.limiteur.attendre(url))
+
+            # Je mesure le temps passé sur le réseau et je classe les échecs par raison
+            debut = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=entetes, timeout=timeout or self.timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                latence = time.perf_counter() - debut
+                self.metriques.observer('latence_requete_secondes', latence)
+                self.metriques.echec('timeout' if isinstance(e, requests.Timeout) else 'connexion')
+                self._signaler(url, None, latence)
+                raise
+
+            latence = time.perf_counter() - debut
+            self.metriques.observer('latence_requete_secondes', latence)
+            self.metriques.incrementer('requetes')
+            self.metriques.incrementer('octets_telecharges', _octets_recus(response))
+
+            # Je donne la réponse au limiteur pour qu'il adapte le rythme
+            self._signaler(url, response.status_code, latence, response.headers.get('Retry-After'))
+
+            # Le serveur est surchargé : je réessaie après la pause imposée par le limiteur
+            if self._surcharge_geree_par_limiteur and response.status_code in STATUTS_SURCHARGE and tentative < self.tentatives:
+                self.metriques.echec(f"http_{response.status_code}")
+                continue
+            break
+
+        # La page n'a pas changé : je réutilise le contenu en cache
+        if response.status_code == 304 and entree is not None:
+            self.metriques.incrementer('reponses_revalidees')
+            self.cache.rafraichir(url, meta)
+            return ReponseEnCache(url, contenu, meta.get('entetes', {}))
+
+        if response.status_code >= 400:
+            self.metriques.echec(f"http_{response.status_code}")
+        response.raise_for_status()
+
+        if self.cache is not None:
+            self.cache.ecrire(url, response)
+
+        return response
+
+    def _signaler(self, url, statut, latence, retry_after=None):
+        if self.limiteur is not None:
+            self.limiteur.signaler(url, statut, latence, retry_after)
+
+    def fermer(self):
+        """
+        Ferme toutes les connexions du pool
+        """
+        self.session.close()
@@ -0,0 +1 @@
+# Ce fichier à la racine suffit pour que pytest ajoute la racine du projet au chemin d'import des tests
@@ -0,0 +1,193 @@
+import datetime
+import os
+
+import pandas as pd
+import streamlit as st
+
+from agregats import DOSSIER_AGREGATS, Agregats
+from export import TAILLE_MORCEAU, exporter_octets
+from index_annonces import IndexAnnonces, cles_annonces
+from navigateur import NavigateurDonnees
+from nettoyage import nettoyer_donnees
+from stockage import DOSSIER_PARQUET, EcrivainParLots, fichiers_stockage, iterer_annonces, version_stockage
+
+# Je définis les chemins vers les fichiers CSV
+FICHIERS_CSV = {
+    "chiens": "data/chiens.csv",
+    "moutons": "data/moutons.csv",
+    "poules": "data/poules.csv",
+    "autres": "data/autres.csv"
+}
+
+# Je lis seulement les colonnes utiles (les colonnes ajoutées par Web Scraper sont ignorées), toutes en texte
+TYPES_COLONNES = {
+    'Nom': str,
+    'Details': str,
+    'Prix': str,
+    'Adresse': str,
+    'Image_lien': str
+}
+
+
+# Fonction pour obtenir la version d'un fichier (sa date de modification)
+def version_fichier(chemin):
+    """
+    Renvoie la date de modification du fichier en nanosecondes, ou None s'il n'existe pas
+    """
+    try:
+        return os.stat(chemin).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+# Fonction pour lister les catégories dont le fichier est absent
+def categories_manquantes():
+    """
+    Renvoie les catégories dont le fichier CSV n'existe pas
+    """
+    return [categorie for categorie, chemin in FICHIERS_CSV.items() if version_fichier(chemin) is None]
+
+
+# La version fait partie de la clé du cache : le fichier est relu seulement s'il a été modifié
+@st.cache_data(show_spinner=False, max_entries=16)
+def _lire_csv(chemin, version):
+    return pd.read_csv(
+        chemin,
+        usecols=lambda colonne: colonne in TYPES_COLONNES,
+        dtype=TYPES_COLONNES
+    )
+
+
+def _morceaux_csv(chemin):
+    # Je relis le fichier par morceaux au lieu de le charger en entier
+    with pd.read_csv(
+        chemin,
+        usecols=lambda colonne: colonne in TYPES_COLONNES,
+        dtype=TYPES_COLONNES,
+        chunksize=TAILLE_MORCEAU
+    ) as morceaux:
+        yield from morceaux
+
+
+def _morceaux_stockage(categorie, fichiers):
+    # Les fichiers écrits avant l'index des annonces peuvent encore contenir des doublons, parfois sans Cle_annonce :
+    # je la complète pour que le navigateur ne garde que la première ligne de chaque annonce
+    for morceau in iterer_annonces(categorie, fichiers=fichiers):
+        yield morceau.assign(Cle_annonce=cles_annonces(morceau).to_numpy())
+
+
+# Je garde peu de fichiers d'export en cache : ils ne sont construits que sur demande
+@st.cache_data(show_spinner=False, max_entries=4)
+def _exporter_csv(chemin, version, format_export):
+    return exporter_octets(_morceaux_csv(chemin), format_export)
+
+
+# Je partage une seule copie SQLite des données entre toutes les sessions
+@st.cache_resource
+def obtenir_navigateur():
+    """
+    Renvoie le navigateur de données partagé
+    """
+    return NavigateurDonnees()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _lire_agregats(categorie, version):
+    return Agregats(categorie)
+
+
+def _marqueur_import(categorie):
+    # Les fichiers qui commencent par _ sont ignorés par la lecture du stockage
+    return os.path.join(DOSSIER_PARQUET, f"categorie={categorie}", "_import_csv")
+
+
+# Fonction pour importer une seule fois un fichier CSV dans le stockage Parquet
+def importer_csv(categorie):
+    """
+    Nettoie le fichier CSV de la catégorie et l'écrit dans le stockage Parquet.
+    Renvoie False si le fichier CSV est manquant.
+    """
+    chemin = FICHIERS_CSV[categorie]
+    version = version_fichier(chemin)
+    if version is None:
+        return False
+
+    # J'utilise la date du fichier comme date de scraping
+    date_scrape = datetime.date.fromtimestamp(version / 1e9).isoformat()
+
+    # Je passe par l'index pour ne pas stocker une annonce déjà scrapée par l'application
+    index = IndexAnnonces(categorie)
+    ecrivain = EcrivainParLots(categorie, index=index, agregats=Agregats(categorie), date_scrape=date_scrape)
+    ecrivain.ajouter(nettoyer_donnees(_lire_csv(chemin, version)))
+    ecrivain.vider()
+    index.fermer()
+
+    # Je note que l'import est fait pour ne jamais importer le fichier deux fois
+    # (le dossier de la catégorie n'existe pas encore si aucune ligne n'a été écrite)
+    marqueur = _marqueur_import(categorie)
+    os.makedirs(os.path.dirname(marqueur), exist_ok=True)
+    with open(marqueur, 'w', encoding='utf-8') as f:
+        f.write(chemin)
+    return True
+
+
+def _importer_si_besoin(categorie):
+    # La première fois, j'importe le fichier CSV de la catégorie
+    if not os.path.exists(_marqueur_import(categorie)):
+        importer_csv(categorie)
+
+
+# Fonction pour préparer le fichier de téléchargement des données brutes d'une catégorie
+def exporter_donnees_brutes(categorie, format_export):
+    """
+    Renvoie le contenu du fichier d'export (voir FORMATS_EXPORT), ou None si le fichier CSV est manquant.
+    Le fichier n'est reconstruit que si le fichier CSV a changé.
+    """
+    chemin = FICHIERS_CSV[categorie]
+    version = version_fichier(chemin)
+    if version is None:
+        return None
+    return _exporter_csv(chemin, version, format_export)
+
+
+# Fonction pour charger les statistiques précalculées d'une catégorie
+def charger_agregats(categorie):
+    """
+    Renvoie les statistiques de la catégorie pour le dashboard, ou None si la catégorie n'a aucune donnée
+    """
+    _importer_si_besoin(categorie)
+
+    if version_stockage(categorie) is None:
+        return None
+    # Le fichier des statistiques change à chaque écriture dans le stockage
+    return _lire_agregats(categorie, version_fichier(os.path.join(DOSSIER_AGREGATS, f"{categorie}.json")))
+
+
+# Fonction pour préparer la navigation dans les données d'une catégorie
+def table_navigation(categorie, brutes=False):
+    """
+    Met à jour la copie SQLite des données de la catégorie (nettoyées, ou brutes depuis le fichier CSV)
+    seulement si elles ont changé, et renvoie le nom de sa table, ou None si la catégorie n'a aucune donnée
+    """
+    if brutes:
+        chemin = FICHIERS_CSV[categorie]
+        version = version_fichier(chemin)
+        if version is None:
+            return None
+        nom = f"brutes_{categorie}"
+        obtenir_navigateur().synchroniser(nom, version, lambda: _morceaux_csv(chemin))
+    else:
+        _importer_si_besoin(categorie)
+        version = version_stockage(categorie)
+        if version is None:
+            return None
+        # Le stockage ne fait que des ajouts : seuls les nouveaux fichiers sont copiés
+        nom = f"stockage_{categorie}"
+        obtenir_navigateur().synchroniser(
+            nom,
+            version,
+            lambda fichiers: _morceaux_stockage(categorie, fichiers),
+            fichiers=lambda: fichiers_stockage(categorie),
+            cle='Cle_annonce'
+        )
+    return nom
@@ -0,0 +1,84 @@
+import gzip
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Je définis les formats proposés : extension -> (libellé, type MIME)
+FORMATS_EXPORT = {
+    'csv': ("CSV", 'text/csv'),
+    'csv.gz': ("CSV compressé (gzip)", 'application/gzip'),
+    'parquet': ("Parquet", 'application/vnd.apache.parquet'),
+    'jsonl': ("JSON Lines", 'application/x-ndjson')
+}
+
+# Nombre de lignes sérialisées à la fois
+TAILLE_MORCEAU = 50_000
+
+
+def _ecrire_texte(morceaux, flux, format_export):
+    for numero, morceau in enumerate(morceaux):
+        if format_export == 'jsonl':
+            if len(morceau):
+                flux.write(morceau.to_json(orient='records', lines=True, force_ascii=False).rstrip('\n') + '\n')
+        else:
+            # Seul le premier morceau écrit la ligne d'en-tête
+            morceau.to_csv(flux, header=numero == 0, index=False)
+
+
+def _ecrire_parquet(morceaux, destination, schema=None):
+    # Avec un schéma connu, je crée l'écrivain tout de suite : même sans aucun morceau le fichier reste valide
+    ecrivain = pq.ParquetWriter(destination, schema, compression='zstd') if schema is not None else None
+    try:
+        for morceau in morceaux:
+            if ecrivain is None:
+                schema = pa.Schema.from_pandas(morceau, preserve_index=False)
+                # Une colonne vide dans le premier morceau serait typée null : je la passe en texte
+                schema = pa.schema([pa.field(champ.name, pa.string()) if pa.types.is_null(champ.type) else champ for champ in schema])
+                ecrivain = pq.ParquetWriter(destination, schema, compression='zstd')
+            # Chaque morceau devient un groupe de lignes du fichier
+            ecrivain.write_table(pa.Table.from_pandas(morceau, schema=schema, preserve_index=False))
+
+        # Sans schéma ni morceau, j'écris quand même un fichier Parquet (vide) lisible
+        if ecrivain is None:
+            ecrivain = pq.ParquetWriter(destination, pa.schema([]), compression='zstd')
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
+
+
+# Fonction pour écrire des morceaux de table dans un fichier ouvert en binaire
+def ecrire_export(morceaux, format_export, destination, schema=None):
+    """
+    Écrit les morceaux (tables pandas aux mêmes colonnes) au format demandé, l'un après l'autre :
+    seul le morceau en cours est sérialisé en mémoire.
+    Le schéma pyarrow, s'il est connu, fixe les colonnes du fichier Parquet.
+    """
+    if format_export not in FORMATS_EXPORT:
+        raise ValueError(f"Format d'export inconnu : {format_export}")
+
+    if format_export == 'parquet':
+        _ecrire_parquet(morceaux, destination, schema)
+        return
+
+    compresse = format_export == 'csv.gz'
+    binaire = gzip.GzipFile(fileobj=destination, mode='wb') if compresse else destination
+    flux = io.TextIOWrapper(binaire, encoding='utf-8', newline='')
+    try:
+        _ecrire_texte(morceaux, flux, format_export)
+        flux.flush()
+    finally:
+        # Je détache le flux texte pour ne pas fermer la destination de l'appelant
+        flux.detach()
+        if compresse:
+            binaire.close()
+
+
+# Fonction pour produire un fichier d'export en mémoire
+def exporter_octets(morceaux, format_export):
+    """
+    Renvoie le contenu du fichier d'export (bytes), prêt pour un bouton de téléchargement
+    """
+    tampon = io.BytesIO()
+    ecrire_export(morceaux, format_export, tampon)
+    return tampon.getvalue()
@@ -0,0 +1,296 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, UnidentifiedImageError
+
+from cache_disque import CacheDisque
+from client_http import ClientHTTP
+from metriques import Metriques
+from politesse import PlanificateurPolitesse
+from recuperation import iterer_en_parallele
+
+# Je définis les paramètres du pipeline d'images
+DOSSIER_IMAGES = 'data/cache/images'
+TAILLE_MAX_IMAGES = 300 * 1024 * 1024
+TAILLE_VIGNETTE = (200, 200)
+CONCURRENCE_IMAGES = 8
+
+# Une image qui n'a pas pu être récupérée n'est pas redemandée pendant ce temps (en secondes)
+DUREE_ECHEC_IMAGE = 600
+
+# Les images ont leurs propres mesures : elles ne se mélangent pas à celles du scraper
+METRIQUES_IMAGES = Metriques()
+
+# Au-delà de cette distance (en bits sur 64), deux photos ne sont plus considérées comme identiques
+DISTANCE_DOUBLON = 4
+
+
+# Fonction pour créer le client HTTP des images (sans cache HTTP : les vignettes ont leur propre cache)
+def creer_client_images():
+    """
+    Crée le client HTTP utilisé pour télécharger les images des annonces.
+    Une vignette manquante n'est pas grave : un seul réessai et des délais courts
+    pour ne jamais bloquer l'affichage de la galerie.
+    """
+    return ClientHTTP(
+        taille_pool=CONCURRENCE_IMAGES,
+        tentatives=1,
+        delai_connexion=2,
+        delai_lecture=5,
+        limiteur=PlanificateurPolitesse(debit_initial=2.0, debit_min=1.0, debit_max=10.0, metriques=METRIQUES_IMAGES),
+        metriques=METRIQUES_IMAGES
+    )
+
+
+# Fonction pour calculer l'empreinte perceptuelle d'une image (dHash)
+def calculer_dhash(image):
+    """
+    Renvoie le dHash de l'image sur 64 bits, en hexadécimal : deux photos identiques
+    (même recadrées ou recompressées) ont des empreintes très proches
+    """
+    # Je réduis l'image à 9 x 8 pixels gris et je compare chaque pixel à son voisin de droite
+    pixels = list(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    bits = 0
+    for ligne in range(8):
+        for colonne in range(8):
+            gauche = pixels[ligne * 9 + colonne]
+            droite = pixels[ligne * 9 + colonne + 1]
+            bits = (bits << 1) | (gauche > droite)
+    return f"{bits:016x}"
+
+
+# Fonction exécutée dans le pool de processus (elle doit rester au niveau du module)
+def preparer_vignette(contenu, taille=TAILLE_VIGNETTE):
+    """
+    Renvoie la vignette JPEG de l'image et son dHash, ou None si l'image est illisible
+    """
+    try:
+        with Image.open(io.BytesIO(contenu)) as image:
+            image.load()
+            dhash = calculer_dhash(image)
+            image = image.convert('RGB')
+            image.thumbnail(taille)
+            sortie = io.BytesIO()
+            image.save(sortie, format='JPEG', quality=80, optimize=True)
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+    return sortie.getvalue(), dhash
+
+
+# Fonction pour comparer deux empreintes perceptuelles
+def distance_hamming(dhash_a, dhash_b):
+    """
+    Renvoie le nombre de bits différents entre deux dHash
+    """
+    return bin(int(dhash_a, 16) ^ int(dhash_b, 16)).count('1')
+
+
+# Fonction pour regrouper les photos presque identiques
+def trouver_doublons(empreintes, distance_max=DISTANCE_DOUBLON):
+    """
+    Reçoit {clé: dHash} et renvoie les groupes de clés (au moins deux) dont les photos sont presque identiques
+    """
+    cles = list(empreintes)
+    parents = list(range(len(cles)))
+
+    def racine(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    # Je découpe les 64 bits en distance_max + 1 bandes : deux empreintes proches ont forcément
+    # une bande identique, je ne compare donc que les empreintes qui partagent une bande
+    nombre_bandes = distance_max + 1
+    largeur = 64 // nombre_bandes
+    for bande in range(nombre_bandes):
+        debut = bande * largeur
+        fin = 64 if bande == nombre_bandes - 1 else debut + largeur
+        seaux = {}
+        for i, cle in enumerate(cles):
+            valeur = (int(empreintes[cle], 16) >> (64 - fin)) & ((1 << (fin - debut)) - 1)
+            seaux.setdefault(valeur, []).append(i)
+
+        for membres in seaux.values():
+            for position, i in enumerate(membres):
+                for j in membres[position + 1:]:
+                    if racine(i) != racine(j) and distance_hamming(empreintes[cles[i]], empreintes[cles[j]]) <= distance_max:
+                        parents[racine(i)] = racine(j)
+
+    groupes = {}
+    for i, cle in enumerate(cles):
+        groupes.setdefault(racine(i), []).append(cle)
+    return [groupe for groupe in groupes.values() if len(groupe) > 1]
+
+
+# Classe pour garder les vignettes sur le disque
+class CacheImages(CacheDisque):
+    """
+    Cache disque des vignettes, adressé par le contenu de l'image d'origine (SHA-256) :
+    une même photo republiée sous plusieurs URLs n'est stockée qu'une fois.
+    Les vignettes les moins récemment utilisées sont supprimées au-delà de taille_max.
+    Les URLs en échec sont retenues en mémoire pendant duree_echec.
+    """
+
+    extension = '.jpg'
+
+    def __init__(self, dossier=DOSSIER_IMAGES, taille_max=TAILLE_MAX_IMAGES, duree_echec=DUREE_ECHEC_IMAGE):
+        super().__init__(dossier, taille_max)
+        self.duree_echec = duree_echec
+        self._dossier_urls = os.path.join(dossier, 'urls')
+        self._echecs = {}
+        self._verrou_echecs = threading.Lock()
+
+        os.makedirs(self._dossier_urls, exist_ok=True)
+
+    def marquer_echec(self, url):
+        """
+        Retient que l'image de l'URL n'a pas pu être récupérée
+        """
+        with self._verrou_echecs:
+            self._echecs[url] = time.monotonic()
+
+    def echec_recent(self, url):
+        """
+        Indique si l'image de l'URL a échoué il y a moins de duree_echec secondes
+        """
+        with self._verrou_echecs:
+            date_echec = self._echecs.get(url)
+            if date_echec is None:
+                return False
+            if time.monotonic() - date_echec < self.duree_echec:
+                return True
+            del self._echecs[url]
+            return False
+
+    def _chemin_url(self, url):
+        return os.path.join(self._dossier_urls, hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def _empreinte(self, url):
+        try:
+            with open(self._chemin_url(url), encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _lire_meta(self, empreinte):
+        try:
+            with open(os.path.join(self.dossier, f"{empreinte}.json"), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def chemin_vignette(self, url):
+        """
+        Renvoie le chemin de la vignette de l'URL, ou None si elle n'est pas en cache
+        """
+        empreinte = self._empreinte(url)
+        if empreinte is None:
+            return None
+
+        chemin = os.path.join(self.dossier, f"{empreinte}.jpg")
+        try:
+            # Je marque la vignette comme récemment utilisée pour l'éviction LRU
+            os.utime(chemin)
+        except OSError:
+            return None
+        return chemin
+
+    def dhash(self, url):
+        """
+        Renvoie le dHash de la photo de l'URL, ou None si elle n'est pas en cache
+        """
+        empreinte = self._empreinte(url)
+        meta = self._lire_meta(empreinte) if empreinte else None
+        return meta['dhash'] if meta else None
+
+    def connait_contenu(self, empreinte):
+        """
+        Indique si la vignette de ce contenu est déjà en cache
+        """
+        return os.path.exists(os.path.join(self.dossier, f"{empreinte}.jpg"))
+
+    def associer(self, url, empreinte):
+        """
+        Fait pointer l'URL vers une vignette déjà en cache
+        """
+        self._ecrire_atomique(self._chemin_url(url), empreinte.encode('utf-8'))
+
+    def ecrire(self, url, empreinte, vignette, dhash):
+        """
+        Enregistre la vignette d'un contenu et fait pointer l'URL vers elle
+        """
+        chemin = os.path.join(self.dossier, f"{empreinte}.jpg")
+        ancienne_taille = os.path.getsize(chemin) if os.path.exists(chemin) else 0
+
+        # J'écris la vignette avant ses métadonnées et l'URL, pour qu'un lecteur ne voie jamais une URL sans vignette
+        self._ecrire_atomique(chemin, vignette)
+        self._ecrire_atomique(os.path.join(self.dossier, f"{empreinte}.json"), json.dumps({'dhash': dhash}).encode('utf-8'))
+        self.associer(url, empreinte)
+        self._ajouter_taille(len(vignette) - ancienne_taille)
+
+
+# Fonction pour créer le pool de processus qui prépare les vignettes
+def creer_pool_vignettes(nombre_processus=None):
+    """
+    Crée le pool de processus des vignettes (le redimensionnement et le dHash occupent le processeur)
+    """
+    return ProcessPoolExecutor(max_workers=nombre_processus)
+
+
+# Fonction pour récupérer les vignettes d'une liste d'images
+def recuperer_vignettes(client, cache, urls, pool=None, concurrence=CONCURRENCE_IMAGES):
+    """
+    Télécharge en parallèle les images absentes du cache, prépare leurs vignettes dans le pool
+    de processus et renvoie {url: chemin de la vignette ou None si l'image est inutilisable}.
+    Les images en échec récent ne sont pas redemandées.
+    """
+    chemins = {url: cache.chemin_vignette(url) for url in dict.fromkeys(urls) if url}
+    manquantes = [url for url, chemin in chemins.items() if chemin is None and not cache.echec_recent(url)]
+    if not manquantes:
+        return chemins
+
+    pool_local = pool is None
+    if pool_local:
+        pool = creer_pool_vignettes()
+
+    try:
+        en_preparation = []
+        for url, futur in iterer_en_parallele(client.get, manquantes, concurrence):
+            try:
+                contenu = futur.result().content
+            except Exception:
+                METRIQUES_IMAGES.echec('image_erreur_requete')
+                cache.marquer_echec(url)
+                continue
+            METRIQUES_IMAGES.incrementer('images_telechargees')
+
+            # Une photo déjà connue sous une autre URL n'est préparée qu'une fois
+            empreinte = hashlib.sha256(contenu).hexdigest()
+            if cache.connait_contenu(empreinte):
+                cache.associer(url, empreinte)
+                chemins[url] = cache.chemin_vignette(url)
+                continue
+
+            # Je prépare les vignettes pendant que les téléchargements suivants continuent
+            en_preparation.append((url, empreinte, pool.submit(preparer_vignette, contenu)))
+
+        for url, empreinte, futur in en_preparation:
+            resultat = futur.result()
+            if resultat is None:
+                METRIQUES_IMAGES.echec('image_illisible')
+                cache.marquer_echec(url)
+                continue
+            vignette, dhash = resultat
+            cache.ecrire(url, empreinte, vignette, dhash)
+            chemins[url] = cache.chemin_vignette(url)
+    finally:
+        if pool_local:
+            pool.shutdown()
+
+    return chemins
@@ -0,0 +1,195 @@
+import datetime
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Je reconnais l'identifiant à la fin du lien de détail (.../poulet-de-chair-729710)
+MOTIF_ID_LIEN = re.compile(r'-(\d+)/?(?:\?.*)?$')
+# Ou dans le nom de l'image (thumb_4029054_uploaded_image1_...)
+MOTIF_ID_IMAGE = re.compile(r'thumb_(\d+)_')
+MOTIF_ESPACES = re.compile(r'\s+')
+
+# Colonnes qui servent d'empreinte quand l'annonce n'a pas d'identifiant (le prix n'en fait pas partie)
+COLONNES_EMPREINTE = ('Nom', 'Details', 'Adresse', 'Image_lien')
+
+# SQLite limite le nombre de paramètres d'une requête : je cherche les clés par paquets
+TAILLE_PAQUET = 500
+
+# Nombre de liens d'images convertis à la fois pour en extraire l'identifiant
+TAILLE_PAQUET_LIENS = 10_000
+
+
+# Fonction pour retrouver l'identifiant d'une annonce
+def extraire_id_annonce(lien_detail=None, image_lien=None):
+    """
+    Renvoie l'identifiant de l'annonce à partir du lien de détail ou du lien de l'image, ou None
+    """
+    if lien_detail:
+        correspondance = MOTIF_ID_LIEN.search(lien_detail)
+        if correspondance:
+            return correspondance.group(1)
+
+    if image_lien:
+        correspondance = MOTIF_ID_IMAGE.search(image_lien)
+        if correspondance:
+            return correspondance.group(1)
+
+    return None
+
+
+# Fonction pour calculer l'empreinte du contenu d'une annonce sans identifiant
+def _empreinte(valeurs):
+    texte = '\x1f'.join(MOTIF_ESPACES.sub(' ', valeur).strip().lower() if isinstance(valeur, str) else '' for valeur in valeurs)
+    return 'h' + hashlib.sha1(texte.encode('utf-8')).hexdigest()[:16]
+
+
+# Fonction pour calculer la clé de déduplication de chaque annonce
+def cles_annonces(df):
+    """
+    Renvoie la clé de chaque ligne : l'identifiant de l'annonce (colonne Id_annonce ou lien de l'image),
+    sinon une empreinte du nom, de l'adresse et de l'image.
+    """
+    cles = pd.Series(None, index=df.index, dtype=object)
+
+    # Je réutilise la clé déjà calculée au nettoyage, puis l'identifiant, puis celui du lien de l'image
+    if 'Cle_annonce' in df.columns:
+        cles = cles.fillna(df['Cle_annonce'].astype(object))
+    if 'Id_annonce' in df.columns:
+        ids = df['Id_annonce'].astype(object).astype(str)
+        cles = cles.fillna(ids.where(ids.str.fullmatch(r'\d+')))
+
+    manquantes = cles.isna().to_numpy()
+    if 'Image_lien' in df.columns and manquantes.any():
+        # Je ne lis que les liens des lignes encore sans clé, par paquets : str.extract (ou la colonne
+        # entière convertie en objets Python) prendrait autant de mémoire que la colonne elle-même
+        positions = np.flatnonzero(manquantes)
+        ids_images = []
+        for debut in range(0, len(positions), TAILLE_PAQUET_LIENS):
+            liens = df['Image_lien'].iloc[positions[debut:debut + TAILLE_PAQUET_LIENS]].to_numpy(dtype=object)
+            ids_images.extend(extraire_id_annonce(image_lien=lien) if isinstance(lien, str) else None for lien in liens)
+        cles[manquantes] = ids_images
+        manquantes = cles.isna().to_numpy()
+
+    if manquantes.any():
+        colonnes = [colonne for colonne in COLONNES_EMPREINTE if colonne in df.columns]
+        contenus = df.loc[manquantes, colonnes].astype(object).itertuples(index=False, name=None)
+        cles[manquantes] = [_empreinte(contenu) for contenu in contenus]
+
+    return cles
+
+
+# Classe pour mémoriser toutes les annonces déjà vues, toutes catégories et tous scrapings confondus
+class IndexAnnonces:
+    """
+    Index persistant des annonces déjà stockées (SQLite), partagé par toutes les catégories.
+    Chaque annonce est repérée par sa clé (voir cles_annonces) et garde sa catégorie,
+    ses dates de première et dernière apparition et l'historique de son prix.
+    """
+
+    def __init__(self, categorie, dossier='data/index'):
+        self.categorie = categorie
+        os.makedirs(dossier, exist_ok=True)
+
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(os.path.join(dossier, 'annonces.sqlite'), timeout=30, check_same_thread=False)
+        # Le journal WAL laisse les autres catégories lire pendant qu'une tâche écrit
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        with self._connexion:
+            self._connexion.execute("""
+                CREATE TABLE IF NOT EXISTS annonces (
+                    cle TEXT PRIMARY KEY,
+                    categorie TEXT NOT NULL,
+                    prix INTEGER,
+                    premiere_vue TEXT NOT NULL,
+                    derniere_vue TEXT NOT NULL,
+                    nombre_vues INTEGER NOT NULL DEFAULT 1
+                ) WITHOUT ROWID
+            """)
+            self._connexion.execute("CREATE INDEX IF NOT EXISTS annonces_categorie ON annonces (categorie)")
+            self._connexion.execute("""
+                CREATE TABLE IF NOT EXISTS historique_prix (
+                    cle TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    prix INTEGER NOT NULL,
+                    PRIMARY KEY (cle, date)
+                ) WITHOUT ROWID
+            """)
+
+    def __contains__(self, cle):
+        with self._verrou:
+            return self._connexion.execute("SELECT 1 FROM annonces WHERE cle = ?", (cle,)).fetchone() is not None
+
+    def __len__(self):
+        with self._verrou:
+            return self._connexion.execute("SELECT COUNT(*) FROM annonces WHERE categorie = ?", (self.categorie,)).fetchone()[0]
+
+    def _prix_connus(self, cles):
+        # Je renvoie {clé: prix} pour les clés déjà présentes dans l'index
+        cles = list(cles)
+        connus = {}
+        for debut in range(0, len(cles), TAILLE_PAQUET):
+            paquet = cles[debut:debut + TAILLE_PAQUET]
+            marques = ', '.join('?' * len(paquet))
+            connus.update(self._connexion.execute(f"SELECT cle, prix FROM annonces WHERE cle IN ({marques})", paquet))
+        return connus
+
+    def nouvelles(self, df):
+        """
+        Renvoie un masque des lignes à stocker : les annonces jamais vues,
+        une seule fois chacune (la dernière occurrence)
+        """
+        cles = cles_annonces(df)
+        with self._verrou:
+            connues = self._prix_connus(set(cles))
+        return (~cles.duplicated(keep='last') & ~cles.isin(connues)).to_numpy()
+
+    def enregistrer(self, df, date_vue=None):
+        """
+        Ajoute les nouvelles annonces à l'index et met à jour la dernière apparition
+        et l'historique du prix des annonces déjà connues
+        """
+        if date_vue is None:
+            date_vue = datetime.date.today().isoformat()
+
+        cles = cles_annonces(df)
+        prix = df['Prix_nettoye'] if 'Prix_nettoye' in df.columns else pd.Series(pd.NA, index=df.index)
+
+        # Une annonce vue plusieurs fois dans le lot garde son dernier prix
+        derniers_prix = {cle: None if pd.isna(valeur) else int(valeur) for cle, valeur in zip(cles, prix)}
+
+        with self._verrou, self._connexion:
+            anciens_prix = self._prix_connus(derniers_prix)
+
+            self._connexion.executemany("""
+                INSERT INTO annonces (cle, categorie, prix, premiere_vue, derniere_vue) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (cle) DO UPDATE SET
+                    prix = coalesce(excluded.prix, prix),
+                    premiere_vue = min(premiere_vue, excluded.premiere_vue),
+                    derniere_vue = max(derniere_vue, excluded.derniere_vue),
+                    nombre_vues = nombre_vues + 1
+            """, [(cle, self.categorie, valeur, date_vue, date_vue) for cle, valeur in derniers_prix.items()])
+
+            # Je ne garde dans l'historique que les prix nouveaux ou modifiés
+            self._connexion.executemany(
+                "INSERT OR REPLACE INTO historique_prix (cle, date, prix) VALUES (?, ?, ?)",
+                [(cle, date_vue, valeur) for cle, valeur in derniers_prix.items()
+                 if valeur is not None and (cle not in anciens_prix or anciens_prix[cle] != valeur)]
+            )
+
+    def historique_prix(self, cle):
+        """
+        Renvoie la liste des couples (date, prix) connus pour une annonce, du plus ancien au plus récent
+        """
+        with self._verrou:
+            return self._connexion.execute(
+                "SELECT date, prix FROM historique_prix WHERE cle = ? ORDER BY date", (cle,)
+            ).fetchall()
+
+    def fermer(self):
+        with self._verrou:
+            self._connexion.close()
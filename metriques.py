@@ -0,0 +1,180 @@
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+# Je définis les bornes des histogrammes (en secondes)
+BORNES_LATENCE = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BORNES_ANALYSE = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+PREFIXE = 'scraper_'
+
+# Le débit de pages est mesuré sur les pages traitées pendant cette durée (en secondes)
+FENETRE_DEBIT = 60.0
+
+
+def _borne_json(valeur):
+    # JSON n'a pas d'infini : un quantile au-delà de la dernière borne devient null
+    return None if valeur == float('inf') else valeur
+
+
+# Classe pour répartir des mesures dans des intervalles fixes
+class Histogramme:
+    """
+    Histogramme à intervalles fixes, au format des histogrammes Prometheus
+    """
+
+    def __init__(self, bornes):
+        self.bornes = bornes
+        # Le dernier intervalle reçoit les valeurs au-delà de la dernière borne
+        self.comptes = [0] * (len(bornes) + 1)
+        self.somme = 0.0
+        self.total = 0
+
+    def observer(self, valeur):
+        self.comptes[bisect.bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.total += 1
+
+    def quantile(self, q):
+        """
+        Renvoie la borne supérieure de l'intervalle qui contient le quantile q (approximation)
+        """
+        if self.total == 0:
+            return None
+        rang = q * self.total
+        cumul = 0
+        for borne, compte in zip(self.bornes, self.comptes):
+            cumul += compte
+            if cumul >= rang:
+                return borne
+        return float('inf')
+
+    def en_dict(self):
+        """
+        Renvoie l'histogramme sous forme de dictionnaire exportable en JSON
+        (p50 et p99 valent None s'ils dépassent la dernière borne)
+        """
+        return {
+            'bornes': list(self.bornes),
+            'comptes': list(self.comptes),
+            'somme': self.somme,
+            'total': self.total,
+            'p50': _borne_json(self.quantile(0.5)),
+            'p99': _borne_json(self.quantile(0.99))
+        }
+
+
+# Classe qui regroupe toutes les mesures du scraper
+class Metriques:
+    """
+    Compteurs, histogrammes et échecs par raison, partagés par tous les threads du scraper
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """
+        Remet toutes les mesures à zéro
+        """
+        with self._verrou:
+            self.compteurs = defaultdict(float)
+            self.echecs = defaultdict(int)
+            self.histogrammes = {
+                'latence_requete_secondes': Histogramme(BORNES_LATENCE),
+                'temps_analyse_secondes': Histogramme(BORNES_ANALYSE)
+            }
+            self.dates_pages = deque()
+
+    def incrementer(self, nom, valeur=1):
+        with self._verrou:
+            self.compteurs[nom] += valeur
+
+    def observer(self, nom, valeur):
+        with self._verrou:
+            self.histogrammes[nom].observer(valeur)
+
+    def echec(self, raison, nombre=1):
+        """
+        Compte un échec en le classant par raison (timeout, http_503, carte_sans_prix...)
+        """
+        with self._verrou:
+            self.echecs[raison] += nombre
+
+    def page_traitee(self):
+        with self._verrou:
+            self.dates_pages.append(time.monotonic())
+            self.compteurs['pages_traitees'] += 1
+            self._oublier_anciennes_pages()
+
+    def _oublier_anciennes_pages(self):
+        limite = time.monotonic() - FENETRE_DEBIT
+        while self.dates_pages and self.dates_pages[0] < limite:
+            self.dates_pages.popleft()
+
+    def pages_par_seconde(self):
+        """
+        Renvoie le débit effectif sur les pages traitées pendant les FENETRE_DEBIT dernières secondes :
+        un scraping lancé longtemps après le précédent n'est pas noyé dans l'attente entre les deux
+        """
+        with self._verrou:
+            self._oublier_anciennes_pages()
+            if len(self.dates_pages) < 2 or self.dates_pages[-1] == self.dates_pages[0]:
+                return 0.0
+            # La première page de la fenêtre marque le départ : je compte les pages suivantes
+            return (len(self.dates_pages) - 1) / (self.dates_pages[-1] - self.dates_pages[0])
+
+    def instantane(self):
+        """
+        Renvoie une copie de toutes les mesures sous forme de dictionnaire
+        """
+        pages_par_seconde = self.pages_par_seconde()
+        with self._verrou:
+            return {
+                'compteurs': dict(self.compteurs),
+                'echecs': dict(self.echecs),
+                'histogrammes': {nom: histogramme.en_dict() for nom, histogramme in self.histogrammes.items()},
+                'pages_par_seconde': pages_par_seconde
+            }
+
+    def exporter_json(self):
+        """
+        Exporte les mesures en JSON
+        """
+        return json.dumps(self.instantane(), indent=2, ensure_ascii=False)
+
+    def exporter_prometheus(self):
+        """
+        Exporte les mesures au format texte de Prometheus
+        """
+        donnees = self.instantane()
+        lignes = []
+
+        for nom, valeur in sorted(donnees['compteurs'].items()):
+            lignes.append(f"# TYPE {PREFIXE}{nom}_total counter")
+            lignes.append(f"{PREFIXE}{nom}_total {valeur:g}")
+
+        lignes.append(f"# TYPE {PREFIXE}echecs_total counter")
+        for raison, nombre in sorted(donnees['echecs'].items()):
+            lignes.append(f'{PREFIXE}echecs_total{{raison="{raison}"}} {nombre}')
+
+        for nom, histogramme in donnees['histogrammes'].items():
+            lignes.append(f"# TYPE {PREFIXE}{nom} histogram")
+            cumul = 0
+            for borne, compte in zip(histogramme['bornes'] + ['+Inf'], histogramme['comptes']):
+                cumul += compte
+                lignes.append(f'{PREFIXE}{nom}_bucket{{le="{borne}"}} {cumul}')
+            lignes.append(f"{PREFIXE}{nom}_sum {histogramme['somme']:g}")
+            lignes.append(f"{PREFIXE}{nom}_count {histogramme['total']}")
+
+        lignes.append(f"# TYPE {PREFIXE}pages_par_seconde gauge")
+        lignes.append(f"{PREFIXE}pages_par_seconde {donnees['pages_par_seconde']:g}")
+
+        return "\n".join(lignes) + "\n"
+
+
+# Je partage une seule instance dans tout le processus (toutes les sessions et tâches)
+METRIQUES = Metriques()
@@ -0,0 +1,221 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+CHEMIN_NAVIGATEUR = 'data/navigateur.sqlite'
+
+# Colonnes dans lesquelles la recherche textuelle est faite
+COLONNES_RECHERCHE = ('Nom', 'Details')
+
+# Colonnes indexées pour les filtres et les tris les plus courants
+COLONNES_INDEXEES = ('Prix_nettoye', 'Ville')
+
+
+def _nom_sql(nom):
+    # Je protège les noms de tables et de colonnes (ils viennent des fichiers, pas de l'utilisateur)
+    return '"' + str(nom).replace('"', '""') + '"'
+
+
+# Classe pour parcourir de grandes tables sans les envoyer entières au navigateur
+class NavigateurDonnees:
+    """
+    Copie indexée (SQLite) des tables affichées dans l'application : les filtres, le tri
+    et la pagination sont faits par SQLite et seule la page demandée revient en mémoire
+    """
+
+    def __init__(self, chemin=CHEMIN_NAVIGATEUR):
+        os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(chemin, timeout=30, check_same_thread=False)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        with self._connexion:
+            self._connexion.execute("CREATE TABLE IF NOT EXISTS versions (nom TEXT PRIMARY KEY, version TEXT NOT NULL)")
+            # Fichiers déjà copiés, pour les tables dont la source ne fait que des ajouts
+            self._connexion.execute("CREATE TABLE IF NOT EXISTS fichiers (nom TEXT NOT NULL, fichier TEXT NOT NULL, PRIMARY KEY (nom, fichier))")
+
+    def synchroniser(self, nom, version, morceaux, fichiers=None, cle=None):
+        """
+        Met à jour la copie de la table si sa version a changé depuis la dernière copie.
+        Sans fichiers, morceaux est une fonction qui renvoie les morceaux (tables pandas) de la table entière,
+        recopiée à chaque changement. Pour une source qui ne fait que des ajouts, fichiers est une fonction
+        qui renvoie ses fichiers : seuls les fichiers pas encore copiés sont passés à morceaux et ajoutés.
+        Dans ce cas, les lignes dont la colonne cle est déjà présente sont ignorées.
+        """
+        version = str(version)
+        with self._verrou:
+            ligne = self._connexion.execute("SELECT version FROM versions WHERE nom = ?", (nom,)).fetchone()
+            if ligne is not None and ligne[0] == version:
+                return
+
+            if fichiers is None:
+                self._recopier(nom, morceaux())
+            else:
+                self._ajouter_fichiers(nom, fichiers(), morceaux, cle)
+            with self._connexion:
+                self._connexion.execute("INSERT OR REPLACE INTO versions (nom, version) VALUES (?, ?)", (nom, version))
+
+    def _recopier(self, nom, morceaux):
+        # Je remplis une table de chargement puis je la renomme : les lecteurs ne voient jamais une copie partielle
+        chargement = f"{nom}__chargement"
+        with self._connexion:
+            self._connexion.execute(f"DROP TABLE IF EXISTS {_nom_sql(chargement)}")
+            self._inserer(chargement, morceaux)
+            self._connexion.execute(f"DROP TABLE IF EXISTS {_nom_sql(nom)}")
+            if self._colonnes(chargement):
+                self._connexion.execute(f"ALTER TABLE {_nom_sql(chargement)} RENAME TO {_nom_sql(nom)}")
+                self._indexer(nom)
+
+    def _ajouter_fichiers(self, nom, fichiers, morceaux, cle):
+        copies = {ligne[0] for ligne in self._connexion.execute("SELECT fichier FROM fichiers WHERE nom = ?", (nom,))}
+        nouveaux = [fichier for fichier in fichiers if fichier not in copies]
+
+        with self._connexion:
+            # Je recopie tout la première fois, ou si un fichier copié a disparu (stockage vidé)
+            if not copies or not copies.issubset(fichiers) or not self._colonnes(nom):
+                self._connexion.execute(f"DROP TABLE IF EXISTS {_nom_sql(nom)}")
+                self._connexion.execute("DELETE FROM fichiers WHERE nom = ?", (nom,))
+                nouveaux = list(fichiers)
+            if not nouveaux:
+                return
+
+            # L'ajout se fait dans une seule transaction : les autres connexions ne voient pas une copie partielle
+            self._inserer(nom, morceaux(nouveaux), cle)
+            self._indexer(nom)
+            self._connexion.executemany(
+                "INSERT INTO fichiers (nom, fichier) VALUES (?, ?)", [(nom, fichier) for fichier in nouveaux]
+            )
+
+    def _colonnes(self, nom):
+        return [ligne[1] for ligne in self._connexion.execute(f"PRAGMA table_info({_nom_sql(nom)})")]
+
+    def _inserer(self, nom, morceaux, cle=None):
+        colonnes = self._colonnes(nom)
+        for morceau in morceaux:
+            # Je crée la table au premier morceau et j'ajoute les colonnes apparues depuis
+            for colonne in morceau.columns:
+                if colonne not in colonnes:
+                    definition = f"{_nom_sql(colonne)} {'INTEGER' if colonne == 'Prix_nettoye' else 'TEXT'}"
+                    if colonnes:
+                        self._connexion.execute(f"ALTER TABLE {_nom_sql(nom)} ADD COLUMN {definition}")
+                    else:
+                        self._connexion.execute(f"CREATE TABLE {_nom_sql(nom)} ({definition})")
+                    colonnes.append(colonne)
+            # L'index unique sur la clé écarte les lignes déjà copiées
+            if cle is not None and cle in colonnes:
+                self._connexion.execute(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {_nom_sql(f'{nom}_{cle}')} ON {_nom_sql(nom)} ({_nom_sql(cle)})"
+                )
+            if len(morceau) == 0:
+                continue
+
+            # Je passe tout en objets Python, les valeurs manquantes deviennent NULL
+            morceau = morceau.astype(object)
+            morceau = morceau.where(morceau.notna(), None)
+            noms = ', '.join(_nom_sql(colonne) for colonne in morceau.columns)
+            marques = ', '.join('?' * len(morceau.columns))
+            self._connexion.executemany(
+                f"INSERT OR IGNORE INTO {_nom_sql(nom)} ({noms}) VALUES ({marques})",
+                morceau.itertuples(index=False, name=None)
+            )
+
+    def _indexer(self, nom):
+        colonnes = self._colonnes(nom)
+        for colonne in COLONNES_INDEXEES:
+            if colonne in colonnes:
+                self._connexion.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_nom_sql(f'{nom}_{colonne}')} ON {_nom_sql(nom)} ({_nom_sql(colonne)})"
+                )
+
+    def colonnes(self, nom):
+        """
+        Renvoie les colonnes de la table (liste vide si elle n'existe pas)
+        """
+        with self._verrou:
+            return self._colonnes(nom)
+
+    def valeurs_distinctes(self, nom, colonne):
+        """
+        Renvoie les valeurs distinctes d'une colonne, triées
+        """
+        if colonne not in self.colonnes(nom):
+            return []
+        with self._verrou:
+            return [ligne[0] for ligne in self._connexion.execute(
+                f"SELECT DISTINCT {_nom_sql(colonne)} FROM {_nom_sql(nom)} WHERE {_nom_sql(colonne)} IS NOT NULL ORDER BY 1"
+            )]
+
+    def bornes(self, nom, colonne):
+        """
+        Renvoie le minimum et le maximum d'une colonne, ou (None, None)
+        """
+        if colonne not in self.colonnes(nom):
+            return None, None
+        with self._verrou:
+            return self._connexion.execute(
+                f"SELECT MIN({_nom_sql(colonne)}), MAX({_nom_sql(colonne)}) FROM {_nom_sql(nom)}"
+            ).fetchone()
+
+    def _filtres(self, colonnes, prix_min=None, prix_max=None, villes=None, recherche=None, avec_image=False):
+        conditions = []
+        parametres = []
+
+        if 'Prix_nettoye' in colonnes:
+            if prix_min is not None:
+                conditions.append('"Prix_nettoye" >= ?')
+                parametres.append(int(prix_min))
+            if prix_max is not None:
+                conditions.append('"Prix_nettoye" <= ?')
+                parametres.append(int(prix_max))
+
+        if villes and 'Ville' in colonnes:
+            conditions.append(f"\"Ville\" IN ({', '.join('?' * len(villes))})")
+            parametres.extend(villes)
+
+        colonnes_recherche = [colonne for colonne in COLONNES_RECHERCHE if colonne in colonnes]
+        if recherche and colonnes_recherche:
+            # Je neutralise les jokers de LIKE présents dans le texte cherché
+            motif = '%' + recherche.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append('(' + ' OR '.join(f"{_nom_sql(colonne)} LIKE ? ESCAPE '\\'" for colonne in colonnes_recherche) + ')')
+            parametres.extend([motif] * len(colonnes_recherche))
+
+        if avec_image and 'Image_lien' in colonnes:
+            conditions.append("\"Image_lien\" LIKE 'http%'")
+
+        clause = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return clause, parametres
+
+    def compter(self, nom, **filtres):
+        """
+        Renvoie le nombre de lignes qui passent les filtres
+        (prix_min, prix_max, villes, recherche, avec_image)
+        """
+        colonnes = self.colonnes(nom)
+        if not colonnes:
+            return 0
+        clause, parametres = self._filtres(colonnes, **filtres)
+        with self._verrou:
+            return self._connexion.execute(f"SELECT COUNT(*) FROM {_nom_sql(nom)} {clause}", parametres).fetchone()[0]
+
+    def interroger(self, nom, tri=None, descendant=False, limite=50, decalage=0, **filtres):
+        """
+        Renvoie une page de la table (limite lignes à partir de decalage), filtrée et triée par SQLite
+        """
+        colonnes = self.colonnes(nom)
+        if not colonnes:
+            return pd.DataFrame()
+
+        clause, parametres = self._filtres(colonnes, **filtres)
+        # Je n'accepte que le tri sur une colonne existante ; les valeurs manquantes restent à la fin
+        ordre = f"ORDER BY {_nom_sql(tri)} {'DESC' if descendant else 'ASC'} NULLS LAST" if tri in colonnes else ''
+
+        with self._verrou:
+            df = pd.read_sql_query(
+                f"SELECT * FROM {_nom_sql(nom)} {clause} {ordre} LIMIT ? OFFSET ?",
+                self._connexion,
+                params=parametres + [int(limite), int(decalage)]
+            )
+        if 'Prix_nettoye' in df.columns:
+            df['Prix_nettoye'] = df['Prix_nettoye'].astype('Int64')
+        return df
@@ -0,0 +1,98 @@
+import re
+
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+from index_annonces import cles_annonces
+
+# Je compile les expressions régulières une seule fois
+MOTIF_NON_CHIFFRES = re.compile(r'\D+')
+MOTIF_ESPACES = re.compile(r'\s+')
+
+PAYS = 'sénégal'
+
+# Au-delà, le prix ne tient pas dans un entier 64 bits (Int64) : c'est une saisie aberrante
+PRIX_MAX = 2 ** 63 - 1
+
+
+# Fonction pour convertir un prix texte ("450 000CFA", "Prix sur demande") en entier
+def _convertir_prix(prix):
+    if not isinstance(prix, str):
+        return None
+    chiffres = MOTIF_NON_CHIFFRES.sub('', prix)
+    # "Prix sur demande" n'a pas de chiffres : c'est une valeur manquante, pas un prix nul
+    if not chiffres:
+        return None
+    valeur = int(chiffres)
+    return valeur if valeur <= PRIX_MAX else None
+
+
+# Fonction pour découper une adresse ("Fann, Dakar, Sénégal") en adresse normalisée, ville et région
+def _decouper_adresse(adresse):
+    if not isinstance(adresse, str):
+        return 'N/A', None, None
+
+    adresse = MOTIF_ESPACES.sub(' ', adresse.strip())
+    parties = [partie.strip() for partie in adresse.split(',') if partie.strip()]
+
+    # Je retire le pays, identique pour toutes les annonces
+    if parties and parties[-1].lower() == PAYS:
+        parties = parties[:-1]
+
+    if not parties:
+        return adresse or 'N/A', None, None
+    return adresse, parties[0], parties[-1]
+
+
+def _categorielle(codes, valeurs):
+    # Je regroupe les valeurs identiques puis je construis la colonne catégorielle à partir des codes
+    codes_valeurs, categories = pd.factorize(pd.Series(valeurs, dtype=object))
+    return pd.Categorical.from_codes(codes_valeurs[codes], categories=categories)
+
+
+# Fonction pour nettoyer les données
+def nettoyer_donnees(df):
+    """
+    Nettoie les données scrapées.
+    Les prix et les adresses sont traités une seule fois par valeur distincte
+    puis redistribués sur toutes les lignes.
+    Chaque annonce n'apparaît qu'une fois (voir cles_annonces), avec sa dernière version.
+    """
+    # Je garde une seule ligne par annonce, même si elle a été republiée avec un autre prix
+    cles = cles_annonces(df)
+    doublons = cles.duplicated(keep='last').to_numpy()
+    # Sans doublon je ne recopie pas la table
+    if doublons.any():
+        df = df[~doublons].reset_index(drop=True)
+        cles = cles[~doublons]
+
+    nouvelles_colonnes = {'Cle_annonce': cles.to_numpy()}
+
+    # Je convertis chaque prix distinct en entier, les prix absents restent vides (pd.NA)
+    if 'Prix' in df.columns:
+        codes, valeurs = pd.factorize(df['Prix'])
+        # Le code -1 (prix manquant) prend la dernière valeur de la liste, qui est vide
+        prix_distincts = pd.array([_convertir_prix(prix) for prix in valeurs] + [None], dtype='Int64')
+        nouvelles_colonnes['Prix_nettoye'] = prix_distincts.take(codes)
+
+    # Je normalise chaque adresse distincte et j'en extrais la ville et la région
+    if 'Adresse' in df.columns:
+        codes, valeurs = pd.factorize(df['Adresse'])
+        decoupages = [_decouper_adresse(adresse) for adresse in valeurs] + [_decouper_adresse(None)]
+        adresses, villes, regions = zip(*decoupages)
+        nouvelles_colonnes['Adresse'] = _categorielle(codes, adresses)
+        nouvelles_colonnes['Ville'] = _categorielle(codes, villes)
+        nouvelles_colonnes['Region'] = _categorielle(codes, regions)
+
+    # Je remplis les valeurs manquantes des colonnes textes restantes (objet ou type str de pandas)
+    for colonne in df.columns:
+        if colonne not in nouvelles_colonnes and (is_object_dtype(df[colonne]) or is_string_dtype(df[colonne])):
+            nouvelles_colonnes[colonne] = df[colonne].fillna('N/A')
+
+    # J'assemble toutes les colonnes en une seule opération
+    df = df.assign(**nouvelles_colonnes)
+
+    # Je supprime les lignes complètement vides
+    df = df.dropna(how='all')
+
+    return df
@@ -0,0 +1,173 @@
+import email.utils
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from client_http import USER_AGENT
+from metriques import METRIQUES
+
+# Codes HTTP qui signifient que le serveur demande de ralentir
+STATUTS_SURCHARGE = (429, 503)
+
+
+# Fonction pour lire l'en-tête Retry-After (en secondes ou en date HTTP)
+def lire_retry_after(valeur):
+    """
+    Renvoie le délai demandé par Retry-After en secondes, ou None
+    """
+    if not valeur:
+        return None
+    try:
+        return max(0.0, float(valeur))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(valeur)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+# Classe qui garde le rythme autorisé pour un hôte
+class EtatHote:
+    def __init__(self, debit):
+        self.debit = debit
+        self.debit_max = None
+        # Latence habituelle de l'hôte (moyenne mobile exponentielle) et date de la dernière réduction
+        self.latence_moyenne = None
+        self.derniere_reduction = 0.0
+        self.prochain_envoi = 0.0
+        self.pause_jusqua = 0.0
+        self.robots_lus = False
+        self.verrou_robots = threading.Lock()
+
+
+# Classe pour adapter le rythme des requêtes à la santé du serveur
+class PlanificateurPolitesse:
+    """
+    Planificateur de requêtes par hôte en AIMD : le débit augmente un peu après chaque réponse
+    normale et il est divisé dès que le serveur ralentit (latence bien au-dessus de sa latence habituelle),
+    renvoie 429/503 ou demande une pause (Retry-After). Le débit n'est divisé qu'une fois par intervalle
+    (latence habituelle ou écart entre deux requêtes) : une rafale de réponses lentes ne compte qu'une fois.
+    Il respecte le Crawl-delay de robots.txt et un plafond global de requêtes
+    par seconde, partagé par tout ce qui utilise ce planificateur.
+    """
+
+    # Le client HTTP me laisse réessayer les réponses 429/503 pour que je les voie toutes
+    adaptatif = True
+
+    def __init__(self, debit_initial=1.0, debit_min=0.1, debit_max=8.0, debit_global_max=10.0,
+                 pas_augmentation=0.1, facteur_reduction=0.5, facteur_lenteur=2.0, latence_min=0.5,
+                 poids_latence=0.2, lire_robots=True, metriques=METRIQUES):
+        self.debit_initial = debit_initial
+        self.debit_min = debit_min
+        self.debit_max = debit_max
+        self.debit_global_max = debit_global_max
+        self.pas_augmentation = pas_augmentation
+        self.facteur_reduction = facteur_reduction
+        self.facteur_lenteur = facteur_lenteur
+        self.latence_min = latence_min
+        self.poids_latence = poids_latence
+        self.lire_robots = lire_robots
+        self.metriques = metriques
+
+        self._hotes = {}
+        self._prochain_envoi_global = 0.0
+        self._verrou = threading.Lock()
+
+    def _etat(self, hote):
+        with self._verrou:
+            if hote not in self._hotes:
+                self._hotes[hote] = EtatHote(self.debit_initial)
+            return self._hotes[hote]
+
+    def _charger_robots(self, url, etat):
+        # Je lis robots.txt une seule fois par hôte, avant la première requête
+        with etat.verrou_robots:
+            if etat.robots_lus:
+                return
+            etat.robots_lus = True
+
+            url_robots = f"{urlparse(url).scheme}://{urlparse(url).netloc}/robots.txt"
+            try:
+                response = requests.get(url_robots, headers={'User-Agent': USER_AGENT}, timeout=5)
+                if response.status_code != 200:
+                    return
+            except requests.RequestException:
+                return
+
+            robots = RobotFileParser()
+            robots.parse(response.text.splitlines())
+            delai = robots.crawl_delay(USER_AGENT)
+            if delai:
+                # Le débit de cet hôte ne dépassera jamais 1 / Crawl-delay
+                with self._verrou:
+                    etat.debit_max = 1.0 / float(delai)
+                    etat.debit = min(etat.debit, etat.debit_max)
+
+    def debit(self, url):
+        """
+        Renvoie le débit actuel (requêtes / seconde) autorisé pour l'hôte de l'URL
+        """
+        return self._etat(urlparse(url).netloc).debit
+
+    def attendre(self, url):
+        """
+        Bloque jusqu'au prochain créneau autorisé pour l'hôte et renvoie le temps attendu en secondes
+        """
+        etat = self._etat(urlparse(url).netloc)
+        if self.lire_robots and not etat.robots_lus:
+            self._charger_robots(url, etat)
+
+        # Je réserve le créneau sous le verrou, puis j'attends sans bloquer les autres threads
+        with self._verrou:
+            maintenant = time.monotonic()
+            creneau = max(maintenant, etat.prochain_envoi, etat.pause_jusqua, self._prochain_envoi_global)
+            etat.prochain_envoi = creneau + 1.0 / etat.debit
+            self._prochain_envoi_global = creneau + 1.0 / self.debit_global_max
+
+        attente = creneau - maintenant
+        if attente > 0:
+            time.sleep(attente)
+        return attente
+
+    def signaler(self, url, statut=None, latence=None, retry_after=None):
+        """
+        Ajuste le débit de l'hôte à partir de la réponse observée.
+        statut vaut None si la requête a échoué (timeout, connexion).
+        """
+        etat = self._etat(urlparse(url).netloc)
+        delai = lire_retry_after(retry_after)
+
+        with self._verrou:
+            debit_max = min(self.debit_max, etat.debit_max or self.debit_max)
+            maintenant = time.monotonic()
+
+            # Je compare la latence à celle que l'hôte a d'habitude, pas à une valeur fixe
+            lente = (
+                latence is not None and etat.latence_moyenne is not None
+                and latence > max(self.latence_min, self.facteur_lenteur * etat.latence_moyenne)
+            )
+            if statut is not None and latence is not None:
+                if etat.latence_moyenne is None:
+                    etat.latence_moyenne = latence
+                else:
+                    etat.latence_moyenne += self.poids_latence * (latence - etat.latence_moyenne)
+
+            if statut is None or statut in STATUTS_SURCHARGE or lente:
+                # Diminution multiplicative : le serveur souffre. Les réponses des requêtes déjà envoyées
+                # arrivent ensemble : je ne réduis qu'une fois par intervalle
+                intervalle = max(etat.latence_moyenne or 0.0, 1.0 / etat.debit)
+                if maintenant - etat.derniere_reduction >= intervalle:
+                    etat.debit = max(self.debit_min, etat.debit * self.facteur_reduction)
+                    etat.derniere_reduction = maintenant
+                    self.metriques.incrementer('ralentissements')
+            elif statut < 400:
+                # Augmentation additive : le serveur répond normalement
+                etat.debit = min(debit_max, etat.debit + self.pas_augmentation)
+
+            if delai is not None:
+                etat.pause_jusqua = max(etat.pause_jusqua, maintenant + delai)
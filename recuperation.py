@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+# Classe pour limiter le nombre de requêtes envoyées à chaque hôte
+class LimiteurDebit:
+    """
+    Limiteur de débit par hôte basé sur un seau à jetons
+    """
+
+    # Le débit est fixe : les réponses 429/503 sont réessayées par urllib3 avec son attente exponentielle
+    adaptatif = False
+
+    def __init__(self, requetes_par_seconde=1.0, rafale=2):
+        self.requetes_par_seconde = requetes_par_seconde
+        self.rafale = rafale
+        # Pour chaque hôte je garde le nombre de jetons et la date du dernier calcul
+        self._seaux = {}
+        self._verrou = threading.Lock()
+
+    def attendre(self, url):
+        """
+        Bloque jusqu'à ce qu'un jeton soit disponible pour l'hôte de l'URL
+        et renvoie le temps attendu en secondes
+        """
+        hote = urlparse(url).netloc
+        attente_totale = 0.0
+
+        while True:
+            with self._verrou:
+                maintenant = time.monotonic()
+                jetons, dernier_calcul = self._seaux.get(hote, (self.rafale, maintenant))
+
+                # Je recharge le seau selon le temps écoulé depuis le dernier calcul
+                jetons = min(self.rafale, jetons + (maintenant - dernier_calcul) * self.requetes_par_seconde)
+
+                if jetons >= 1:
+                    self._seaux[hote] = (jetons - 1, maintenant)
+                    return attente_totale
+
+                self._seaux[hote] = (jetons, maintenant)
+                attente = (1 - jetons) / self.requetes_par_seconde
+
+            # J'attends en dehors du verrou pour ne pas bloquer les autres hôtes
+            time.sleep(attente)
+            attente_totale += attente
+
+    def signaler(self, url, statut=None, latence=None, retry_after=None):
+        """
+        Le débit est fixe : j'ignore les réponses observées
+        """
+
+
+# Fonction pour exécuter des tâches en parallèle tout en gardant l'ordre
+def iterer_en_parallele(fonction, elements, concurrence=4, executeur=None):
+    """
+    Applique la fonction à chaque élément avec un parallélisme borné
+    et renvoie les couples (élément, futur) dans l'ordre des éléments.
+    Si un executeur est fourni (pool partagé), je l'utilise sans le fermer.
+    """
+    elements = iter(elements)
+    en_cours = deque()
+    executeur_local = executeur is None
+    if executeur_local:
+        executeur = ThreadPoolExecutor(max_workers=concurrence)
+
+    # Je garde une petite avance pour que les workers ne restent jamais inactifs
+    fenetre = concurrence * 2
+
+    try:
+        for element in elements:
+            en_cours.append((element, executeur.submit(fonction, element)))
+            if len(en_cours) >= fenetre:
+                yield en_cours.popleft()
+
+        while en_cours:
+            yield en_cours.popleft()
+    finally:
+        # Si l'appelant s'arrête avant la fin, j'annule les tâches pas encore démarrées
+        if executeur_local:
+            executeur.shutdown(wait=False, cancel_futures=True)
+        else:
+            for element, futur in en_cours:
+                futur.cancel()
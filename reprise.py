@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+DOSSIER_REPRISE = 'data/reprise'
+
+# Au-delà d'un jour, les annonces ont changé de page : je recommence le scraping depuis le début
+DUREE_VALIDITE = 24 * 3600
+
+
+# Classe pour reprendre un scraping interrompu là où il s'est arrêté
+class PointDeReprise:
+    """
+    État d'un scraping enregistré sur le disque après chaque page : dernière page terminée,
+    pages en erreur à refaire et lignes pas encore écrites dans le stockage.
+    Le point de reprise ne sert qu'à un scraping lancé avec les mêmes paramètres.
+    """
+
+    def __init__(self, categorie, nombre_pages, incremental=False, dossier=DOSSIER_REPRISE):
+        self.chemin = os.path.join(dossier, f"{categorie}.json")
+        os.makedirs(dossier, exist_ok=True)
+
+        try:
+            with open(self.chemin, encoding='utf-8') as f:
+                self.etat = json.load(f)
+            self.reprise = (
+                time.time() - self.etat['mis_a_jour_le'] < DUREE_VALIDITE
+                and self.etat['nombre_pages'] == nombre_pages
+                and self.etat['incremental'] == incremental
+            )
+        except (OSError, ValueError, KeyError):
+            self.reprise = False
+
+        # Un scraping annulé après sa dernière page n'a plus rien à reprendre : je l'oublie et je recommence
+        if self.reprise and not self.pages_restantes() and not self.lignes:
+            self.supprimer()
+            self.reprise = False
+
+        # Sinon je repars de zéro : le point de reprise précédent sera remplacé à la première page terminée
+        if not self.reprise:
+            self.etat = {
+                'nombre_pages': nombre_pages,
+                'incremental': incremental,
+                'derniere_page': 0,
+                'pages_en_erreur': [],
+                'lignes': []
+            }
+
+    @property
+    def derniere_page(self):
+        return self.etat['derniere_page']
+
+    @property
+    def lignes(self):
+        """
+        Renvoie les lignes brutes récupérées mais pas encore écrites dans le stockage
+        """
+        return self.etat['lignes']
+
+    @property
+    def pages_en_erreur(self):
+        return self.etat['pages_en_erreur']
+
+    def pages_restantes(self):
+        """
+        Renvoie les numéros des pages à scraper : d'abord les pages en erreur, puis celles jamais scrapées
+        """
+        return self.etat['pages_en_erreur'] + list(range(self.etat['derniere_page'] + 1, self.etat['nombre_pages'] + 1))
+
+    def page_terminee(self, page_num, succes, lignes):
+        """
+        Enregistre une page terminée et les lignes qui attendent encore d'être écrites
+        """
+        erreurs = set(self.etat['pages_en_erreur'])
+        if succes:
+            erreurs.discard(page_num)
+        else:
+            erreurs.add(page_num)
+
+        self.etat['derniere_page'] = max(self.etat['derniere_page'], page_num)
+        self.etat['pages_en_erreur'] = sorted(erreurs)
+        self.etat['lignes'] = lignes
+        self._sauvegarder()
+
+    def lignes_ecrites(self):
+        """
+        Note que toutes les lignes en attente ont été écrites dans le stockage
+        """
+        if self.etat['lignes']:
+            self.etat['lignes'] = []
+            self._sauvegarder()
+
+    def supprimer(self):
+        """
+        Supprime le point de reprise d'un scraping terminé
+        """
+        try:
+            os.remove(self.chemin)
+        except FileNotFoundError:
+            pass
+
+    def _sauvegarder(self):
+        self.etat['mis_a_jour_le'] = time.time()
+        # J'écris dans un fichier temporaire pour ne jamais laisser un point de reprise à moitié écrit
+        temporaire = self.chemin + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.etat, f, ensure_ascii=False)
+        os.replace(temporaire, self.chemin)
@@ -0,0 +1,175 @@
+import functools
+
+from analyse import extraire_cartes, extraire_detail
+from cache_http import CacheHTTP
+from client_http import ClientHTTP
+from index_annonces import extraire_id_annonce
+from metriques import METRIQUES
+from politesse import PlanificateurPolitesse
+from recuperation import iterer_en_parallele
+
+# Je définis les URLs et noms de colonnes de chaque catégorie
+URLS_CONFIG = {
+    "chiens": {
+        "url": "https://sn.coinafrique.com/categorie/chiens",
+        "nom_colonne": "Nom"
+    },
+    "moutons": {
+        "url": "https://sn.coinafrique.com/categorie/moutons",
+        "nom_colonne": "Nom"
+    },
+    "poules": {
+        "url": "https://sn.coinafrique.com/categorie/poules-lapins-et-pigeons",
+        "nom_colonne": "Details"
+    },
+    "autres": {
+        "url": "https://sn.coinafrique.com/categorie/autres-animaux",
+        "nom_colonne": "Nom"
+    }
+}
+
+# Je définis les paramètres du moteur de récupération
+CONCURRENCE_MAX = 4
+REQUETES_PAR_SECONDE = 1.0
+REQUETES_PAR_SECONDE_MAX = 8.0
+REQUETES_PAR_SECONDE_GLOBAL = 10.0
+# Une réponse est lente si elle dépasse ce multiple de la latence habituelle de l'hôte
+FACTEUR_LENTEUR = 2.0
+TENTATIVES_MAX = 3
+DELAI_CONNEXION = 5
+DELAI_LECTURE = 15
+DOSSIER_CACHE_HTTP = "data/cache/http"
+DUREE_VIE_CACHE = 3600
+TAILLE_MAX_CACHE = 200 * 1024 * 1024
+
+
+# Fonction pour créer le client HTTP du scraper
+def creer_client():
+    """
+    Crée le client HTTP du scraper avec sa configuration par défaut
+    """
+    return ClientHTTP(
+        # Je prévois assez de connexions pour les pages de liste et les pages de détail
+        taille_pool=CONCURRENCE_MAX * 2,
+        tentatives=TENTATIVES_MAX,
+        delai_connexion=DELAI_CONNEXION,
+        delai_lecture=DELAI_LECTURE,
+        # Le rythme part de REQUETES_PAR_SECONDE puis s'adapte aux réponses du serveur
+        limiteur=PlanificateurPolitesse(
+            debit_initial=REQUETES_PAR_SECONDE,
+            debit_max=REQUETES_PAR_SECONDE_MAX,
+            debit_global_max=REQUETES_PAR_SECONDE_GLOBAL,
+            facteur_lenteur=FACTEUR_LENTEUR
+        ),
+        cache=CacheHTTP(DOSSIER_CACHE_HTTP, DUREE_VIE_CACHE, TAILLE_MAX_CACHE)
+    )
+
+
+# Fonction pour scraper une catégorie page par page
+def iterer_pages(client, url_base, nombre_pages, nom_colonne, preferer_cache=False, ids_connus=None,
+                 rappel_statut=None, executeur=None, pages=None):
+    """
+    Scrape les données d'une catégorie d'animaux et renvoie, page après page et dans l'ordre,
+    le triplet (numéro de page, annonces de la page, erreur éventuelle).
+    Si ids_connus est fourni, je ne garde que les nouvelles annonces et je m'arrête
+    à la première page qui ne contient que des annonces déjà vues.
+    Si executeur est fourni, les requêtes passent par ce pool partagé entre plusieurs catégories.
+    Si pages est fourni, je ne scrape que ces numéros de page, dans cet ordre (pour reprendre un scraping interrompu).
+    """
+    recuperer = functools.partial(client.get, preferer_cache=preferer_cache)
+
+    def statut(texte):
+        if rappel_statut is not None:
+            rappel_statut(texte)
+
+    def recuperer_detail(carte_lien):
+        """
+        Renvoie le détail du produit, ou None si la page de détail est inutilisable
+        """
+        try:
+            response_detail = recuperer(carte_lien)
+        except Exception:
+            METRIQUES.echec('detail_erreur_requete')
+            return None
+        try:
+            return extraire_detail(response_detail.content)
+        except Exception:
+            METRIQUES.echec('detail_illisible')
+            return None
+
+    if pages is None:
+        pages = range(1, nombre_pages + 1)
+
+    # Je construis les URLs de toutes les pages
+    pages = list(pages)
+    urls_pages = [url_base if page_num == 1 else f"{url_base}?page={page_num}" for page_num in pages]
+
+    # Je récupère les pages en parallèle, dans l'ordre des pages
+    resultats = iterer_en_parallele(recuperer, urls_pages, CONCURRENCE_MAX, executeur)
+
+    try:
+        for page_num, (url, futur) in zip(pages, resultats):
+            statut(f"Je scrape la page {page_num}/{nombre_pages}...")
+            page_deja_vue = False
+
+            try:
+                response = futur.result()
+
+                # J'extrais les cartes d'annonces avec le parseur lxml
+                cartes = extraire_cartes(response.content, url)
+
+                statut(f"Je scrape la page {page_num}/{nombre_pages}... {len(cartes)} annonces trouvées")
+
+                # Je construis les lignes de la page (le nom de la carte sert aussi de repli pour les détails)
+                items_page = [{
+                    nom_colonne: carte['nom'],
+                    'Prix': carte['prix'],
+                    'Adresse': carte['adresse'],
+                    'Image_lien': carte['image_lien'],
+                    'Id_annonce': extraire_id_annonce(carte['lien_detail'], carte['image_lien'])
+                } for carte in cartes]
+
+                # Je garde le lien seulement si je dois récupérer le détail du produit
+                liens_details = [carte['lien_detail'] if nom_colonne == "Details" else None for carte in cartes]
+
+                # En mode incrémental, je m'arrête dès qu'une page ne contient que des annonces déjà vues
+                if ids_connus is not None and items_page:
+                    nouveaux = [item['Id_annonce'] is None or item['Id_annonce'] not in ids_connus for item in items_page]
+                    page_deja_vue = not any(nouveaux)
+
+                    # Je ne garde que les nouvelles annonces (et donc seulement leurs pages de détail)
+                    items_page = [item for item, nouveau in zip(items_page, nouveaux) if nouveau]
+                    liens_details = [lien for lien, nouveau in zip(liens_details, nouveaux) if nouveau]
+
+                # Je récupère toutes les pages de détail de la page en un seul lot
+                liens_a_recuperer = [lien for lien in liens_details if lien]
+                if liens_a_recuperer:
+                    statut(f"Page {page_num}/{nombre_pages} - Récupération de {len(liens_a_recuperer)} détails...")
+
+                    details = {}
+                    for lien, futur_detail in iterer_en_parallele(recuperer_detail, liens_a_recuperer, CONCURRENCE_MAX, executeur):
+                        details[lien] = futur_detail.result()
+
+                    # Je rattache chaque détail à sa carte, sinon je garde la description de la carte
+                    for item, lien in zip(items_page, liens_details):
+                        if details.get(lien):
+                            item[nom_colonne] = details[lien]
+
+                # Je garde seulement les annonces pour lesquelles j'ai un nom
+                items_valides = [item for item in items_page if item[nom_colonne] is not None]
+                if len(items_valides) < len(items_page):
+                    METRIQUES.echec('carte_sans_nom', len(items_page) - len(items_valides))
+                METRIQUES.page_traitee()
+                yield page_num, items_valides, None
+
+            except Exception as e:
+                METRIQUES.echec('page_erreur')
+                METRIQUES.page_traitee()
+                yield page_num, [], e
+
+            if page_deja_vue:
+                statut(f"La page {page_num} ne contient que des annonces déjà vues, j'arrête le scraping")
+                break
+    finally:
+        # J'annule les pages encore en attente si on s'arrête avant la fin
+        resultats.close()
@@ -0,0 +1,228 @@
+import datetime
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from export import TAILLE_MORCEAU, ecrire_export
+
+DOSSIER_PARQUET = 'data/parquet'
+
+# La date de scraping est une partition : je la garde en texte (AAAA-MM-JJ)
+PARTITIONNEMENT = ds.partitioning(pa.schema([('date_scrape', pa.string())]), flavor='hive')
+
+
+def _dossier_categorie(categorie, dossier):
+    return os.path.join(dossier, f"categorie={categorie}")
+
+
+def _type_stocke(type_arrow):
+    # Je stocke toujours le texte en string simple : les colonnes catégorielles (dictionary)
+    # et le type str de pandas (large_string) donneraient des schémas différents d'un fichier à l'autre
+    if pa.types.is_dictionary(type_arrow):
+        type_arrow = type_arrow.value_type
+    if pa.types.is_large_string(type_arrow) or pa.types.is_string_view(type_arrow):
+        return pa.string()
+    return type_arrow
+
+
+def _vers_pandas(table):
+    # Les entiers gardent leurs valeurs manquantes (Int64) au lieu de passer en float
+    return table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+
+def _schema_stocke(schema):
+    return pa.schema([pa.field(champ.name, _type_stocke(champ.type)) for champ in schema])
+
+
+# Fonction pour écrire des annonces nettoyées dans le stockage Parquet
+def ecrire_annonces(categorie, df, date_scrape=None, dossier=DOSSIER_PARQUET):
+    """
+    Écrit les lignes dans un nouveau fichier de la partition categorie=.../date_scrape=...
+    et renvoie son chemin
+    """
+    if date_scrape is None:
+        date_scrape = datetime.date.today().isoformat()
+
+    dossier_partition = os.path.join(_dossier_categorie(categorie, dossier), f"date_scrape={date_scrape}")
+    os.makedirs(dossier_partition, exist_ok=True)
+
+    # Chaque écriture crée son propre fichier : je n'ai jamais besoin de réécrire les anciens
+    chemin = os.path.join(dossier_partition, f"part-{uuid.uuid4().hex}.parquet")
+    table = pa.Table.from_pandas(df.drop(columns=['date_scrape'], errors='ignore'), preserve_index=False)
+    table = table.cast(_schema_stocke(table.schema))
+
+    # J'écris dans un fichier caché temporaire (ignoré à la lecture) pour qu'un lecteur ne voie jamais un fichier incomplet
+    temporaire = os.path.join(dossier_partition, f".{os.path.basename(chemin)}.tmp")
+    pq.write_table(table, temporaire, compression='zstd')
+    os.replace(temporaire, chemin)
+
+    return chemin
+
+
+# Fonction pour savoir si une catégorie a déjà des données stockées
+def version_stockage(categorie, dossier=DOSSIER_PARQUET):
+    """
+    Renvoie une version qui change à chaque écriture dans la catégorie, ou None si elle est vide
+    """
+    dossier_categorie = _dossier_categorie(categorie, dossier)
+    try:
+        partitions = [entree for entree in os.scandir(dossier_categorie) if entree.is_dir()]
+    except FileNotFoundError:
+        return None
+
+    if not partitions:
+        return None
+
+    # Un nouveau fichier modifie la date de son dossier de partition
+    return max(partition.stat().st_mtime_ns for partition in partitions), len(partitions)
+
+
+# Fonction pour lister les fichiers stockés d'une catégorie
+def fichiers_stockage(categorie, dossier=DOSSIER_PARQUET):
+    """
+    Renvoie les chemins des fichiers Parquet de la catégorie, triés.
+    Le stockage ne fait que des ajouts : un fichier listé ne change plus.
+    """
+    fichiers = []
+    for racine, _, noms in os.walk(_dossier_categorie(categorie, dossier)):
+        # Comme à la lecture, j'ignore les fichiers cachés (écritures en cours) et les marqueurs
+        fichiers.extend(os.path.join(racine, nom) for nom in noms if nom.endswith('.parquet') and nom[0] not in '._')
+    return sorted(fichiers)
+
+
+# Fonction pour lire les annonces stockées d'une catégorie
+def lire_annonces(categorie, colonnes=None, filtre=None, depuis=None, dossier=DOSSIER_PARQUET):
+    """
+    Lit les annonces de la catégorie en ne chargeant que les colonnes demandées.
+    Le filtre (expression pyarrow, ex. ds.field('Prix_nettoye') > 0) et la date de départ
+    sont appliqués pendant la lecture : les partitions et groupes de lignes exclus ne sont pas lus.
+    Renvoie None si la catégorie n'a pas encore de données.
+    """
+    if version_stockage(categorie, dossier) is None:
+        return None
+
+    if depuis is not None:
+        condition = ds.field('date_scrape') >= str(depuis)
+        filtre = condition if filtre is None else filtre & condition
+
+    return _vers_pandas(_dataset(categorie, dossier).to_table(columns=colonnes, filter=filtre))
+
+
+def _dataset(categorie, dossier, fichiers=None):
+    dossier_categorie = _dossier_categorie(categorie, dossier)
+    # Avec une liste de fichiers, je retrouve leur date de scraping à partir du dossier de la catégorie
+    source = dossier_categorie if fichiers is None else list(fichiers)
+    options = {'format': 'parquet', 'partitioning': PARTITIONNEMENT, 'partition_base_dir': dossier_categorie}
+    dataset = ds.dataset(source, **options)
+
+    # Les fichiers n'ont pas forcément tous les mêmes colonnes : j'unifie leurs schémas
+    # (les fichiers écrits avant le schéma fixe peuvent encore avoir des colonnes dictionary)
+    schemas = [_schema_stocke(fragment.physical_schema) for fragment in dataset.get_fragments()]
+    schema = pa.unify_schemas(schemas + [PARTITIONNEMENT.schema], promote_options='permissive')
+    return ds.dataset(source, schema=schema, **options)
+
+
+# Fonction pour parcourir les annonces stockées morceau par morceau
+def iterer_annonces(categorie, colonnes=None, taille_morceau=TAILLE_MORCEAU, fichiers=None, dossier=DOSSIER_PARQUET):
+    """
+    Renvoie les annonces de la catégorie (ou seulement celles des fichiers donnés, voir fichiers_stockage)
+    par morceaux d'au plus taille_morceau lignes, sans jamais charger toute la catégorie en mémoire
+    """
+    if fichiers is not None:
+        if not fichiers:
+            return
+    elif version_stockage(categorie, dossier) is None:
+        return
+
+    for lot in _dataset(categorie, dossier, fichiers).to_batches(columns=colonnes, batch_size=taille_morceau):
+        if lot.num_rows:
+            yield _vers_pandas(lot)
+
+
+# Fonction pour exporter une catégorie dans un fichier
+def exporter_fichier(categorie, chemin, format_export='csv', colonnes=None, dossier=DOSSIER_PARQUET):
+    """
+    Exporte les annonces stockées de la catégorie dans un fichier (voir FORMATS_EXPORT)
+    et renvoie le nombre de lignes
+    """
+    lignes = 0
+
+    def compter(morceaux):
+        nonlocal lignes
+        for morceau in morceaux:
+            lignes += len(morceau)
+            yield morceau
+
+    # Je donne le schéma stocké à l'export : le fichier Parquet garde les types du stockage
+    # même si le premier morceau a une colonne entièrement vide
+    schema = None
+    if version_stockage(categorie, dossier) is not None:
+        schema = _dataset(categorie, dossier).schema
+        if colonnes is not None:
+            schema = pa.schema([schema.field(colonne) for colonne in colonnes])
+
+    with open(chemin, 'wb') as f:
+        ecrire_export(compter(iterer_annonces(categorie, colonnes, dossier=dossier)), format_export, f, schema)
+    return lignes
+
+
+# Classe pour écrire les annonces dans le stockage par lots, au fil du scraping
+class EcrivainParLots:
+    """
+    Accumule les lignes nettoyées et les écrit dans le stockage dès que le lot est plein.
+    Si un index est fourni, seules les annonces jamais vues sont écrites ;
+    les autres mettent seulement à jour leur dernière apparition et leur prix dans l'index.
+    Si des agrégats sont fournis, les lignes écrites y sont ajoutées.
+    """
+
+    def __init__(self, categorie, taille_lot=500, index=None, agregats=None, date_scrape=None, dossier=DOSSIER_PARQUET):
+        self.categorie = categorie
+        self.taille_lot = taille_lot
+        self.index = index
+        self.agregats = agregats
+        self.date_scrape = date_scrape
+        self.dossier = dossier
+        self.lignes_ecrites = 0
+        self._morceaux = []
+        self._lignes_en_attente = 0
+
+    @property
+    def lignes_en_attente(self):
+        return self._lignes_en_attente
+
+    def ajouter(self, df):
+        """
+        Ajoute des lignes au lot en cours et l'écrit s'il est plein
+        """
+        if len(df) == 0:
+            return
+        self._morceaux.append(df)
+        self._lignes_en_attente += len(df)
+        if self._lignes_en_attente >= self.taille_lot:
+            self.vider()
+
+    def vider(self):
+        """
+        Écrit le lot en cours dans le stockage
+        """
+        if not self._morceaux:
+            return
+
+        lot = pd.concat(self._morceaux, ignore_index=True)
+        a_ecrire = lot if self.index is None else lot[self.index.nouvelles(lot)]
+        if len(a_ecrire):
+            ecrire_annonces(self.categorie, a_ecrire, self.date_scrape, self.dossier)
+
+        # Je mets l'index à jour seulement après l'écriture, pour qu'il ne mentionne jamais une annonce absente du stockage
+        if self.index is not None:
+            self.index.enregistrer(lot, self.date_scrape)
+        if self.agregats is not None:
+            self.agregats.ajouter(a_ecrire, self.date_scrape)
+
+        self.lignes_ecrites += len(a_ecrire)
+        self._morceaux = []
+        self._lignes_en_attente = 0
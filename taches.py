@@ -0,0 +1,254 @@
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from agregats import Agregats
+from index_annonces import IndexAnnonces
+from nettoyage import nettoyer_donnees
+from reprise import PointDeReprise
+from scraper import URLS_CONFIG, iterer_pages
+from stockage import EcrivainParLots
+
+# Nombre de dernières annonces gardées en mémoire pour l'aperçu d'une tâche
+TAILLE_APERCU = 100
+
+# Je définis les statuts possibles d'une tâche
+EN_ATTENTE = "en attente"
+EN_COURS = "en cours"
+TERMINEE = "terminée"
+ANNULEE = "annulée"
+ECHOUEE = "échouée"
+
+STATUTS_FINAUX = (TERMINEE, ANNULEE, ECHOUEE)
+
+# Je garde les tâches terminées une heure pour que les sessions puissent encore afficher leurs résultats
+DUREE_CONSERVATION = 3600
+
+
+# Classe qui décrit un scraping lancé en arrière-plan
+class Tache:
+    """
+    Scraping d'une catégorie exécuté en arrière-plan, avec sa progression et ses résultats
+    """
+
+    def __init__(self, categorie, nombre_pages, preferer_cache=False, incremental=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.categorie = categorie
+        self.nombre_pages = nombre_pages
+        self.preferer_cache = preferer_cache
+        self.incremental = incremental
+
+        self.statut = EN_ATTENTE
+        self.message = "En attente d'un worker..."
+        self.pages_traitees = 0
+        self.lignes_ecrites = 0
+        self.annonces_connues = 0
+        self.lignes_recuperees = 0
+        self.erreurs = []
+        self.cree_le = time.time()
+        self.termine_le = None
+
+        # Toutes les lignes sont dans le stockage : je ne garde que les dernières pour l'aperçu
+        self._apercu = deque(maxlen=TAILLE_APERCU)
+        self._verrou = threading.Lock()
+        self._annulation = threading.Event()
+        # Sessions qui suivent la tâche : elle n'est annulée que quand la dernière l'abandonne
+        self._sessions = set()
+
+    @property
+    def cle(self):
+        return self.categorie, self.nombre_pages, self.preferer_cache, self.incremental
+
+    @property
+    def terminee(self):
+        return self.statut in STATUTS_FINAUX
+
+    @property
+    def progression(self):
+        return min(self.pages_traitees / self.nombre_pages, 1.0)
+
+    def rattacher(self, session):
+        """
+        Note qu'une session suit cette tâche
+        """
+        with self._verrou:
+            self._sessions.add(session)
+
+    def annuler(self, session=None):
+        """
+        Demande l'arrêt de la tâche après la page en cours.
+        Si session est fourni, je détache seulement cette session et j'arrête la tâche
+        quand plus aucune session ne la suit. Renvoie True si la tâche va s'arrêter.
+        """
+        with self._verrou:
+            self._sessions.discard(session)
+            if session is not None and self._sessions:
+                return False
+        self._annulation.set()
+        return True
+
+    def apercu(self):
+        """
+        Renvoie les dernières lignes nettoyées récupérées (au plus TAILLE_APERCU), ou None
+        """
+        with self._verrou:
+            lignes = list(self._apercu)
+        if not lignes:
+            return None
+        return pd.DataFrame(lignes)
+
+    def _ajouter(self, df):
+        with self._verrou:
+            self._apercu.extend(df.tail(TAILLE_APERCU).to_dict('records'))
+            self.lignes_recuperees += len(df)
+
+
+# Classe qui exécute les scrapings en arrière-plan, partagée par toutes les sessions
+class GestionnaireTaches:
+    """
+    Exécute les tâches de scraping dans un pool de workers et regroupe les demandes identiques
+    """
+
+    def __init__(self, client, nombre_workers=2, executeur_requetes=None):
+        self.client = client
+        # Pool optionnel partagé par toutes les tâches pour les requêtes HTTP
+        self.executeur_requetes = executeur_requetes
+        self._taches = {}
+        self._verrou = threading.Lock()
+        self._executeur = ThreadPoolExecutor(max_workers=nombre_workers, thread_name_prefix="scraping")
+
+        # Deux tâches d'une même catégorie écrivent dans le même stockage : je les exécute l'une après l'autre
+        self._verrous_categories = {categorie: threading.Lock() for categorie in URLS_CONFIG}
+
+    def lancer(self, categorie, nombre_pages, preferer_cache=False, incremental=False, session=None):
+        """
+        Lance une tâche, ou renvoie la tâche identique déjà en cours.
+        session identifie la session qui suit la tâche (voir Tache.annuler).
+        """
+        nouvelle = Tache(categorie, nombre_pages, preferer_cache, incremental)
+        if session is not None:
+            nouvelle.rattacher(session)
+
+        with self._verrou:
+            # Je libère les tâches terminées depuis longtemps
+            limite = time.time() - DUREE_CONSERVATION
+            for id_tache in [t.id for t in self._taches.values() if t.terminee and t.termine_le < limite]:
+                del self._taches[id_tache]
+
+            # Si une session a déjà demandé le même scraping, je partage sa tâche
+            for tache in self._taches.values():
+                if tache.cle == nouvelle.cle and not tache.terminee:
+                    if session is not None:
+                        tache.rattacher(session)
+                    return tache
+
+            self._taches[nouvelle.id] = nouvelle
+
+        self._executeur.submit(self._executer, nouvelle)
+        return nouvelle
+
+    def obtenir(self, id_tache):
+        """
+        Renvoie la tâche correspondant à l'identifiant, ou None
+        """
+        return self._taches.get(id_tache)
+
+    def annuler(self, id_tache, session=None):
+        """
+        Demande l'annulation d'une tâche (ou détache seulement la session, voir Tache.annuler)
+        """
+        tache = self.obtenir(id_tache)
+        if tache is not None:
+            tache.annuler(session)
+
+    def _executer(self, tache):
+        config = URLS_CONFIG[tache.categorie]
+
+        with self._verrous_categories[tache.categorie]:
+            if tache._annulation.is_set():
+                tache.termine_le = time.time()
+                tache.statut = ANNULEE
+                return
+
+            tache.statut = EN_COURS
+
+            def mettre_a_jour_message(texte):
+                tache.message = texte
+
+            try:
+                # Je charge l'index des annonces déjà stockées (utilisé pour filtrer en mode incrémental)
+                index = IndexAnnonces(tache.categorie)
+
+                # J'écris les annonces dans le stockage par lots, au fur et à mesure du scraping
+                ecrivain = EcrivainParLots(tache.categorie, index=index, agregats=Agregats(tache.categorie))
+
+                # Si un scraping précédent a été interrompu, je repars de sa dernière page terminée
+                reprise = PointDeReprise(tache.categorie, tache.nombre_pages, tache.incremental)
+                lignes_en_attente = list(reprise.lignes)
+                if reprise.reprise:
+                    mettre_a_jour_message(f"Reprise du scraping interrompu après la page {reprise.derniere_page}...")
+                    tache.pages_traitees = reprise.derniere_page
+                    if lignes_en_attente:
+                        df_reprise = nettoyer_donnees(pd.DataFrame(lignes_en_attente))
+                        tache._ajouter(df_reprise)
+                        ecrivain.ajouter(df_reprise)
+
+                pages = iterer_pages(
+                    self.client,
+                    config['url'],
+                    tache.nombre_pages,
+                    config['nom_colonne'],
+                    tache.preferer_cache,
+                    index if tache.incremental else None,
+                    rappel_statut=mettre_a_jour_message,
+                    executeur=self.executeur_requetes,
+                    pages=reprise.pages_restantes()
+                )
+
+                try:
+                    for page_num, items_page, erreur in pages:
+                        if erreur is not None:
+                            tache.erreurs.append(f"Erreur lors du scraping de la page {page_num}: {str(erreur)}")
+
+                        if items_page:
+                            df_page = nettoyer_donnees(pd.DataFrame(items_page))
+                            tache._ajouter(df_page)
+                            lignes_en_attente.extend(items_page)
+                            ecrivain.ajouter(df_page)
+
+                        # Les lignes déjà écrites dans le stockage n'ont plus besoin d'être gardées pour la reprise
+                        if ecrivain.lignes_en_attente == 0:
+                            lignes_en_attente = []
+                        reprise.page_terminee(page_num, erreur is None, lignes_en_attente)
+                        tache.pages_traitees = reprise.derniere_page
+
+                        # Je vérifie entre deux pages si l'annulation a été demandée
+                        if tache._annulation.is_set():
+                            break
+                finally:
+                    pages.close()
+                    # J'écris le dernier lot, même en cas d'annulation
+                    ecrivain.vider()
+                    reprise.lignes_ecrites()
+                    tache.lignes_ecrites = ecrivain.lignes_ecrites
+                    tache.annonces_connues = len(index)
+                    index.fermer()
+
+                statut_final = ANNULEE if tache._annulation.is_set() else TERMINEE
+
+                # Un scraping annulé, ou qui a des pages en erreur, garde son point de reprise
+                # pour que le suivant continue là où il s'est arrêté
+                if statut_final == TERMINEE and not reprise.pages_en_erreur:
+                    reprise.supprimer()
+
+            except Exception as e:
+                tache.erreurs.append(str(e))
+                statut_final = ECHOUEE
+
+            # Je date la fin avant de changer le statut, pour que la purge ne voie jamais une tâche finie sans date
+            tache.termine_le = time.time()
+            tache.statut = statut_final
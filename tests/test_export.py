@@ -0,0 +1,26 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from export import exporter_octets
+from stockage import ecrire_annonces, exporter_fichier
+
+
+def test_export_parquet_sans_morceau_reste_lisible():
+    contenu = exporter_octets(iter([]), 'parquet')
+    assert pq.read_table(io.BytesIO(contenu)).num_rows == 0
+
+
+def test_export_parquet_garde_le_schema_stocke(tmp_path):
+    df = pd.DataFrame({'Nom': ['Caniche'], 'Details': [None], 'Prix_nettoye': pd.array([150000], dtype='Int64')})
+    ecrire_annonces('chiens', df, '2024-01-01', tmp_path)
+
+    chemin = tmp_path / 'export.parquet'
+    assert exporter_fichier('chiens', chemin, 'parquet', dossier=tmp_path) == 1
+    assert exporter_fichier('moutons', tmp_path / 'vide.parquet', 'parquet', dossier=tmp_path) == 0
+
+    table = pq.read_table(chemin)
+    assert table.schema.field('Prix_nettoye').type == pa.int64()
+    assert pq.read_table(tmp_path / 'vide.parquet').num_rows == 0
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from index_annonces import IndexAnnonces, cles_annonces, extraire_id_annonce
+
+
+def test_cles_annonces():
+    df = pd.DataFrame({
+        'Nom': ['Caniche', 'Berger', 'Poulets', 'Poulets'],
+        'Adresse': ['Fann, Dakar', None, 'Thiès', 'Thiès'],
+        'Image_lien': [None, 'https://images.coinafrique.com/thumb_4029054_uploaded_image1.jpg', None, None],
+        'Id_annonce': ['729710', None, None, None]
+    })
+    cles = cles_annonces(df)
+
+    assert list(cles[:2]) == ['729710', '4029054']
+    # Sans identifiant, deux annonces identiques ont la même empreinte
+    assert cles[2] == cles[3] and cles[2].startswith('h')
+    assert extraire_id_annonce('https://sn.coinafrique.com/annonce/chiens/caniche-729710') == '729710'
+
+
+def test_nouvelles_puis_enregistrer(tmp_path):
+    index = IndexAnnonces('chiens', dossier=tmp_path)
+    df = pd.DataFrame({
+        'Nom': ['Caniche', 'Berger', 'Caniche'],
+        'Id_annonce': ['1', '2', '1'],
+        'Prix_nettoye': pd.array([100, None, 120], dtype='Int64')
+    })
+
+    # Une annonce vue deux fois dans le lot n'est gardée qu'une fois (la dernière)
+    assert list(index.nouvelles(df)) == [False, True, True]
+    index.enregistrer(df, date_vue='2024-01-01')
+    assert len(index) == 2 and '1' in index
+    assert not index.nouvelles(df).any()
+
+    # Seuls les changements de prix vont dans l'historique
+    index.enregistrer(df.iloc[[2]], date_vue='2024-01-02')
+    index.enregistrer(df.iloc[[0]].assign(Prix_nettoye=pd.array([90], dtype='Int64')), date_vue='2024-01-03')
+    assert index.historique_prix('1') == [('2024-01-01', 120), ('2024-01-03', 90)]
+    index.fermer()
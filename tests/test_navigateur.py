@@ -0,0 +1,42 @@
+import pandas as pd
+
+from navigateur import NavigateurDonnees
+from stockage import ecrire_annonces, fichiers_stockage, iterer_annonces
+
+
+def _annonces(ids, prix):
+    return pd.DataFrame({
+        'Nom': [f"Annonce {id_annonce}" for id_annonce in ids],
+        'Prix_nettoye': pd.array(prix, dtype='Int64'),
+        'Cle_annonce': ids
+    })
+
+
+def test_synchroniser_ne_copie_que_les_nouveaux_fichiers(tmp_path):
+    dossier = tmp_path / 'parquet'
+    navigateur = NavigateurDonnees(str(tmp_path / 'navigateur.sqlite'))
+    lus = []
+
+    def synchroniser(version):
+        def morceaux(fichiers):
+            lus.extend(fichiers)
+            return iterer_annonces('chiens', fichiers=fichiers, dossier=dossier)
+        navigateur.synchroniser('stockage_chiens', version, morceaux,
+                                fichiers=lambda: fichiers_stockage('chiens', dossier), cle='Cle_annonce')
+
+    ecrire_annonces('chiens', _annonces(['1', '2'], [1000, None]), '2024-01-01', dossier)
+    synchroniser(1)
+    assert navigateur.compter('stockage_chiens') == 2
+
+    # Un nouveau fichier (avec une annonce déjà copiée) : seul lui est relu
+    lus.clear()
+    chemin = ecrire_annonces('chiens', _annonces(['2', '3'], [2000, 3000]), '2024-01-02', dossier)
+    synchroniser(2)
+    assert lus == [chemin]
+    assert navigateur.compter('stockage_chiens') == 3
+    assert navigateur.bornes('stockage_chiens', 'Prix_nettoye') == (1000, 3000)
+
+    # Même version : rien n'est relu
+    lus.clear()
+    synchroniser(2)
+    assert lus == []
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from nettoyage import nettoyer_donnees
+
+
+def test_prix_aberrant_ou_sur_demande_devient_vide():
+    df = nettoyer_donnees(pd.DataFrame({
+        'Nom': ['Berger allemand', 'Caniche', 'Bélier', 'Chiot'],
+        'Prix': ['150 000CFA', 'Prix sur demande', '1234567890123456789012 CFA', '111111111111111000CFA'],
+        'Adresse': ['Fann, Dakar, Sénégal', None, 'Thiès, Sénégal', 'Dakar'],
+        'Image_lien': [f"https://images.coinafrique.com/thumb_{i}_a.jpg" for i in range(4)]
+    }))
+
+    assert df['Prix_nettoye'].dtype == 'Int64'
+    assert df['Prix_nettoye'].tolist()[0] == 150000
+    assert df['Prix_nettoye'].isna().tolist() == [False, True, True, False]
+    assert df['Prix_nettoye'].tolist()[3] == 111111111111111000
+
+
+def test_adresses_et_textes_manquants():
+    df = nettoyer_donnees(pd.DataFrame({
+        'Nom': ['Berger allemand', None],
+        'Adresse': ['  Fann ,  Dakar, Sénégal ', None],
+        'Image_lien': ['https://images.coinafrique.com/thumb_1_a.jpg', None]
+    }))
+
+    assert df['Adresse'].tolist() == ['Fann , Dakar, Sénégal', 'N/A']
+    assert df['Ville'].tolist()[0] == 'Fann'
+    assert df['Region'].tolist()[0] == 'Dakar'
+    assert df['Nom'].tolist() == ['Berger allemand', 'N/A']
+
+
+def test_annonce_republiee_gardee_une_fois():
+    df = nettoyer_donnees(pd.DataFrame({
+        'Nom': ['Mouton', 'Mouton'],
+        'Prix': ['100 000CFA', '90 000CFA'],
+        'Image_lien': ['https://images.coinafrique.com/thumb_7_a.jpg', 'https://images.coinafrique.com/thumb_7_b.jpg']
+    }))
+
+    # Je garde la dernière version de l'annonce
+    assert len(df) == 1
+    assert df['Prix_nettoye'].tolist() == [90000]
+    assert df['Cle_annonce'].tolist() == ['7']
@@ -0,0 +1,48 @@
+from metriques import Metriques
+from politesse import PlanificateurPolitesse, lire_retry_after
+
+URL = 'http://exemple.test/categorie/chiens'
+
+
+def _planificateur(**options):
+    return PlanificateurPolitesse(lire_robots=False, metriques=Metriques(), **options)
+
+
+def test_augmentation_additive_jusqua_debit_max():
+    planificateur = _planificateur(debit_initial=1.0, debit_max=1.5, pas_augmentation=0.2)
+    for _ in range(10):
+        planificateur.signaler(URL, 200, 0.1)
+    assert planificateur.debit(URL) == 1.5
+
+
+def test_une_rafale_de_reponses_lentes_ne_reduit_quune_fois():
+    planificateur = _planificateur(debit_initial=4.0)
+    for _ in range(5):
+        planificateur.signaler(URL, 200, 0.1)
+    debit = planificateur.debit(URL)
+
+    # Les réponses des requêtes déjà envoyées arrivent ensemble
+    for _ in range(3):
+        planificateur.signaler(URL, 503)
+    assert planificateur.debit(URL) == debit / 2
+    assert planificateur.metriques.compteurs['ralentissements'] == 1
+
+
+def test_lenteur_mesuree_par_rapport_a_la_latence_habituelle():
+    # Un hôte lent mais régulier n'est pas freiné
+    planificateur = _planificateur(debit_initial=1.0, pas_augmentation=0.1)
+    for _ in range(5):
+        planificateur.signaler(URL, 200, 3.0)
+    assert planificateur.debit(URL) > 1.0
+    assert 'ralentissements' not in planificateur.metriques.compteurs
+
+    # Une réponse bien plus lente que d'habitude l'est
+    planificateur.signaler(URL, 200, 10.0)
+    assert planificateur.metriques.compteurs['ralentissements'] == 1
+
+
+def test_retry_after_met_l_hote_en_pause():
+    planificateur = _planificateur()
+    planificateur.signaler(URL, 429, 0.1, retry_after='0.2')
+    assert planificateur.attendre(URL) > 0.1
+    assert lire_retry_after('abc') is None
@@ -0,0 +1,33 @@
+from reprise import PointDeReprise
+
+
+def test_reprise_des_pages_en_erreur_puis_des_pages_restantes(tmp_path):
+    reprise = PointDeReprise('chiens', 5, dossier=tmp_path)
+    reprise.page_terminee(1, True, [])
+    reprise.page_terminee(2, False, [])
+    reprise.page_terminee(3, True, [{'Nom': 'Caniche'}])
+
+    reprise = PointDeReprise('chiens', 5, dossier=tmp_path)
+    assert reprise.reprise
+    assert reprise.pages_restantes() == [2, 4, 5]
+    assert reprise.lignes == [{'Nom': 'Caniche'}]
+
+
+def test_parametres_differents_repartent_de_zero(tmp_path):
+    reprise = PointDeReprise('chiens', 5, dossier=tmp_path)
+    reprise.page_terminee(1, True, [])
+
+    assert not PointDeReprise('chiens', 10, dossier=tmp_path).reprise
+    assert not PointDeReprise('chiens', 5, incremental=True, dossier=tmp_path).reprise
+
+
+def test_point_de_reprise_complet_est_oublie(tmp_path):
+    # Un scraping annulé après sa dernière page
+    reprise = PointDeReprise('chiens', 2, dossier=tmp_path)
+    reprise.page_terminee(1, True, [])
+    reprise.page_terminee(2, True, [])
+
+    reprise = PointDeReprise('chiens', 2, dossier=tmp_path)
+    assert not reprise.reprise
+    assert reprise.pages_restantes() == [1, 2]
+    assert not (tmp_path / 'chiens.json').exists()
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from nettoyage import nettoyer_donnees
+from stockage import EcrivainParLots, ecrire_annonces, iterer_annonces, lire_annonces
+
+
+def _page(ids, adresses):
+    return nettoyer_donnees(pd.DataFrame({
+        'Nom': [f"Annonce {id_annonce}" for id_annonce in ids],
+        'Prix': ['15 000CFA'] * len(ids),
+        'Adresse': adresses,
+        'Image_lien': [f"https://images.coinafrique.com/thumb_{id_annonce}_a.jpg" for id_annonce in ids],
+        'Id_annonce': ids
+    }))
+
+
+def test_import_csv_puis_scraping_dans_la_meme_partition(tmp_path):
+    # Import CSV : une seule table avec ses propres catégories d'adresses
+    import_csv = nettoyer_donnees(pd.DataFrame({
+        'Nom': ['Berger allemand', 'Caniche'],
+        'Prix': ['150 000CFA', 'Prix sur demande'],
+        'Adresse': ['Fann, Dakar, Sénégal', 'Mbour, Thiès, Sénégal'],
+        'Image_lien': ['https://images.coinafrique.com/thumb_11_a.jpg', None]
+    }))
+    ecrire_annonces('chiens', import_csv, '2024-01-01', tmp_path)
+
+    # Scraping : des pages dont les villes diffèrent, concaténées dans un même lot
+    ecrivain = EcrivainParLots('chiens', taille_lot=3, date_scrape='2024-01-01', dossier=tmp_path)
+    ecrivain.ajouter(_page(['21', '22'], ['Fann, Dakar', 'Yoff, Dakar']))
+    ecrivain.ajouter(_page(['23'], ['Thiès, Thiès']))
+    ecrivain.ajouter(_page(['24'], [None]))
+    ecrivain.vider()
+
+    df = lire_annonces('chiens', dossier=tmp_path)
+    assert len(df) == 6
+    assert set(df['Ville'].dropna()) == {'Fann', 'Mbour', 'Yoff', 'Thiès'}
+    assert df['Prix_nettoye'].dtype == 'Int64'
+    assert df['Prix_nettoye'].isna().sum() == 1
+    assert sum(len(morceau) for morceau in iterer_annonces('chiens', taille_morceau=2, dossier=tmp_path)) == 6